@@ -0,0 +1,116 @@
+"""
+Calculation functions provided by aiida_logger.
+
+Register calculation functions via the "aiida.calculations" entry point in setup.json.
+"""
+from __future__ import absolute_import
+
+from aiida.engine import calcfunction
+from aiida.plugins import CalculationFactory, DataFactory
+
+
+@calcfunction
+def parse_datafile(parameters, datafile):
+    """
+    Parse a datafile directly, without the round-trip of a LoggerCalculation.
+
+    The GC parser reads the content of the SinglefileData node in the same process, avoiding
+    the transport, the scheduler and the extra copy of the retrieved file. The outputs are
+    the same `data` and `metadata` as for a LoggerCalculation.
+
+    :param parameters: a Dict with the parameters used to parse the datafile.
+    :param datafile: the SinglefileData to parse.
+    """
+    from aiida_logger.parsers.file_parsers.base import compose_result
+    from aiida_logger.parsers.logger import parse_arrays
+
+    exit_codes = CalculationFactory('logger').exit_codes
+    result = parse_arrays(datafile, datafile.filename, exit_codes, parameters)
+    if not isinstance(result, dict):
+        # Assume we have an exit code
+        return result
+
+    try:
+        segment_rows = parameters.get_dict()['segment_rows']
+    except KeyError:
+        segment_rows = None
+
+    return compose_result(result['arrays'], result['metadata'], result['profiler'], segment_rows)
+
+
+@calcfunction
+def assemble_series(**data):
+    """
+    Assemble the full series from the data of a full parse and the deltas of later incremental parses.
+
+    :param data: the ArrayData to concatenate, ordered by their keys, e.g. `part_0000`, `part_0001` and so on.
+    """
+    from aiida_logger.utils.array import concatenate_series
+
+    series = DataFactory('array')()
+    for name, array in concatenate_series([data[key] for key in sorted(data.keys())]).items():
+        series.set_array(name, array)
+    return series
+
+
+@calcfunction
+def resample_data(parameters, data, metadata=None):
+    """
+    Resample the data of a parse on a fixed time grid in seconds since the epoch.
+
+    The parameters contain the `interval` of the grid in seconds, and optionally the `reductions`
+    (defaults to mean), the `origin` of the grid in seconds since the epoch (defaults to the epoch,
+    such that the bins start at multiples of the interval), whether to `fill_empty` bins and the
+    names of the `arrays` to resample (defaults to all arrays with one row per time, except the id and
+    the injection index).
+    See :func:`aiida_logger.utils.resample.resample` for details.
+
+    :param parameters: a Dict with the resampling parameters.
+    :param data: the ArrayData with the `time` array and the arrays to resample. A `time` in nanoseconds
+        since the epoch is resampled in seconds since the epoch.
+    :param metadata: the metadata Dict of the parse, with the `start_time` that a `time` in seconds is
+        relative to. If not given, the start time is taken from the `start_epoch` attribute of the data.
+    """
+    from aiida_logger.utils.array import to_columns
+    from aiida_logger.utils.injections import INJECTION_INDEX
+    from aiida_logger.utils.resample import DEFAULT_REDUCTIONS, resample
+    from aiida_logger.utils.segments import array_names, get_array
+
+    settings = parameters.get_dict()
+    time = get_array(data, 'time')
+    if time.dtype.kind == 'i':
+        # Nanoseconds since the epoch, see the time_dtype parameter of the GC parser
+        offset = 0.0
+        time = time / 1e9
+    else:
+        offset = _start_epoch(data, time, metadata)
+    try:
+        names = settings['arrays']
+    except KeyError:
+        names = [name for name in array_names(data) if name not in ('time', 'id', INJECTION_INDEX)]
+    arrays = {name: to_columns(get_array(data, name)) for name in names}
+    arrays = {name: array for name, array in arrays.items() if array.ndim and len(array) == len(time)}
+    resampled = resample(time, arrays,
+                         settings['interval'],
+                         reductions=settings.get('reductions', DEFAULT_REDUCTIONS),
+                         origin=settings.get('origin', 0.0),
+                         fill_empty=settings.get('fill_empty', False),
+                         offset=offset)
+
+    resampled_data = DataFactory('array')()
+    for name, array in resampled.items():
+        resampled_data.set_array(name, array)
+    return resampled_data
+
+
+def _start_epoch(data, time, metadata):
+    """Return the time in seconds since the epoch that the relative `time` of a parse starts from."""
+    from aiida_logger.utils.query import to_epoch
+
+    if metadata is not None and 'start_time' in metadata.get_dict():
+        return to_epoch(metadata.get_dict()['start_time'])
+    try:
+        # The start epoch attribute is the time of the earliest row
+        return data.get_attribute('start_epoch') - (float(time.min()) if len(time) else 0.0)
+    except (AttributeError, KeyError):
+        raise ValueError('The start time of the data is unknown, please pass the metadata of the parse.')
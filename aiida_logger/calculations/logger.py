@@ -33,14 +33,20 @@ class LoggerCalculation(CalcJob):
                    """)
         spec.input_namespace('datafiles', valid_type=DataFactory('singlefile'), dynamic=True, help='A dictionary of datafiles to be analyzed.')
 
-        spec.output('data', valid_type=DataFactory('array'), help='The output data.')
-        spec.output('metadata', valid_type=DataFactory('dict'), help='The output metadata.')
+        spec.output('data', valid_type=DataFactory('array'), required=False, help='The output data.')
+        spec.output('metadata', valid_type=DataFactory('dict'), required=False, help='The output metadata.')
+        spec.output_namespace('datafiles_data', valid_type=DataFactory('array'), required=False, dynamic=True,
+                              help='The output data for each datafile, when more than one datafile is given.')
+        spec.output_namespace('datafiles_metadata', valid_type=DataFactory('dict'), required=False, dynamic=True,
+                              help='The output metadata for each datafile, when more than one datafile is given.')
 
         spec.exit_code(1000, 'ERROR_MISSING_OUTPUT_FILE', message='Could not locate the output file.')
         spec.exit_code(1001, 'ERROR_READING_OUTPUT_FILE', message='Could not read the output file.')
         spec.exit_code(1002, 'ERROR_INVALID_CONTENT_IN_OUTPUT_FILE', message='Data format is unknown and could not be parsed.')
         spec.exit_code(1003, 'ERROR_NO_RETRIEVED_FOLDER', message='Could not obtain the retrieved folder.')
         spec.exit_code(1004, 'ERROR_MISSING_OUTPUT_FILES', message='Could not locate any of the required output files.')
+        spec.exit_code(1005, 'ERROR_INVALID_PARAMETERS', message='The parameters could not be used to parse the datafile.')
+        spec.exit_code(1006, 'ERROR_UNEXPECTED_PARSING_FAILURE', message='An unexpected error occurred while parsing the datafile.')
 
 
     def prepare_for_submission(self, folder):
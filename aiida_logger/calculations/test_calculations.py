@@ -8,6 +8,8 @@ from __future__ import absolute_import
 import os
 import numpy as np
 
+from aiida_logger.utils.fixtures.data import GC_EXAMPLE_LAYOUT
+
 
 def test_process(logger_code):
     """
@@ -26,28 +28,7 @@ def test_process(logger_code):
     parameters.type = 'gc'
     parameters.comment_line = 0
     parameters.data_start_line = 2
-    parameters.data_layout = [[{'time': '%m/%d/%y %H:%M:%S'},
-                               {'id': 'int'},
-                               {'He concentration': 'float'},
-                               {'H2 concentration': 'float'},
-                               {'O2 concentration': 'float'},
-                               {'N2 concentration': 'float'},
-                               {'CH4 concentration': 'float'},
-                               {'CO concentration': 'float'},
-                               {'ignore': 'float'},
-                               {'He area': 'float'},
-                               {'H2 area': 'float'},
-                               {'O2 area': 'float'},
-                               {'N2 area': 'float'},
-                               {'CH4 area': 'float'},
-                               {'CO area': 'float'}],
-                              [{'time': '%m/%d/%y %H:%M:%S'},
-                               {'id': 'int'},
-                               {'CO2 concentration': 'float'},
-                               {'H2O concentration': 'float'},
-                               {'ignore': 'float'},
-                               {'CO2 area': 'float'},
-                               {'H2O area': 'float'}]]
+    parameters.data_layout = GC_EXAMPLE_LAYOUT
     parameters.separator = '\t'
 
     # Define input files to use
@@ -117,3 +98,54 @@ def test_process(logger_code):
                            [2.064600e+00, 5.518600e+00, 1.390600e+04, 6.180700e+04],
                            [6.746800e+00, 3.891000e+00, 3.151360e+05, 5.453800e+04]])
     np.testing.assert_allclose(data.get_array('channel_2'), test_array)
+
+
+def test_parse_datafile():
+    """Test parsing a datafile directly with the calcfunction."""
+    from aiida.plugins import DataFactory
+
+    from aiida_logger.calculations.functions import parse_datafile
+    from aiida_logger.tests import TEST_DIR  # pylint: disable=wrong-import-position
+
+    parameters = {
+        'data_start_line': 2,
+        'data_layout': GC_EXAMPLE_LAYOUT,
+        'separator': '\t'
+    }
+    datafile = DataFactory('singlefile')(file=os.path.join(TEST_DIR, 'input_files', 'gc_example.txt'))
+
+    result, node = parse_datafile.run_get_node(DataFactory('dict')(dict=parameters), datafile)
+
+    assert node.is_finished_ok
+    assert result['data'].get_array('channel_1').shape == (7, 12)
+    assert result['data'].get_array('channel_2').shape == (7, 4)
+    assert result['metadata'].get_dict()['start_time'] == '2019-09-17T11:01:08Z'
+
+
+def test_resample_data():
+    """Test that the time in seconds and in nanoseconds resample on the same grid of absolute time."""
+    from aiida.plugins import DataFactory
+
+    from aiida_logger.calculations.functions import parse_datafile, resample_data
+    from aiida_logger.tests import TEST_DIR  # pylint: disable=wrong-import-position
+
+    parameters = {
+        'data_start_line': 2,
+        'data_layout': GC_EXAMPLE_LAYOUT,
+        'separator': '\t'
+    }
+    settings = DataFactory('dict')(dict={'interval': 600.0, 'reductions': ['mean', 'count']})
+    resampled = []
+    for time_dtype in ['float64', 'int64']:
+        parameters['time_dtype'] = time_dtype
+        datafile = DataFactory('singlefile')(file=os.path.join(TEST_DIR, 'input_files', 'gc_example.txt'))
+        result = parse_datafile(DataFactory('dict')(dict=parameters), datafile)
+        resampled.append(resample_data(settings, result['data'], result['metadata']))
+
+    # The first row is at 11:01:08 UTC, the bins start at whole multiples of ten minutes since the epoch
+    seconds, nanoseconds = resampled
+    assert seconds.get_array('time')[0] == 1568718000.0
+    assert not np.fmod(seconds.get_array('time'), 600.0).any()
+    np.testing.assert_allclose(seconds.get_array('time'), nanoseconds.get_array('time'))
+    np.testing.assert_array_equal(seconds.get_array('count'), nanoseconds.get_array('count'))
+    np.testing.assert_allclose(seconds.get_array('channel_1_mean'), nanoseconds.get_array('channel_1_mean'))
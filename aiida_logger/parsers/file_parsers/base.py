@@ -1,6 +1,22 @@
 from __future__ import absolute_import
 
 from __future__ import print_function
+import io
+import mmap
+import os
+from contextlib import contextmanager
+
+from aiida.plugins import DataFactory
+
+from aiida_logger.parsers.file_parsers.cache import ParseCache, hash_file
+from aiida_logger.parsers.file_parsers.compression import open_decompressed
+from aiida_logger.utils.injections import INJECTION_INDEX
+from aiida_logger.utils.profiling import StageProfiler
+from aiida_logger.utils.query import summary_attributes
+from aiida_logger.utils.segments import segment_arrays
+
+# Default number of characters, or bytes for binary files, to read at a time when streaming
+DEFAULT_CHUNK_SIZE = 1 << 20
 
 
 # pylint: disable=assignment-from-no-return
@@ -14,24 +30,146 @@ class BaseFileParser():
         if parameters:
             self.parameters = parameters.get_dict()
         self.binary = False
+        # Per stage timing and memory instrumentation, enabled by the profile parameter
+        self.profiler = StageProfiler(bool(self.parameters and self.parameters.get('profile', False)))
 
     def parse(self):
         """Parse the quantity of interest."""
+        result = self.parse_arrays()
+        if not isinstance(result, dict):
+            # Assume we have an exit code
+            return result
+
+        segment_rows = self.parameters.get('segment_rows') if self.parameters else None
+        return compose_result(result['arrays'], result['metadata'], self.profiler, segment_rows)
+
+    def parse_arrays(self):
+        """
+        Parse the quantity of interest into a dictionary of arrays and a metadata dictionary.
+
+        No nodes are created, such that this can be called from worker threads. If caching is enabled
+        in the parameters, the result is fetched from the cache when the same file content has
+        previously been parsed with the same parameters.
+        """
+        self.profiler.start()
         try:
-            if self.binary:
-                with self.folder.open(self.filename, 'rb') as file_handle:
-                    result = self._parse(file_handle)
-            else:
-                with self.folder.open(self.filename, 'r') as file_handle:
+            return self._parse_arrays()
+        finally:
+            self.profiler.stop()
+
+    def _parse_arrays(self):
+        """Parse the quantity of interest, using the cache if enabled."""
+        cache = ParseCache.from_parameters(self.parameters)
+        try:
+            if cache is not None:
+                with self.profiler.stage('hash'):
+                    with self.folder.open(self.filename, 'rb') as file_handle:
+                        cache_key = cache.key(hash_file(file_handle), self.__class__.__name__, self.parameters)
+                with self.profiler.stage('cache'):
+                    cached = cache.get(cache_key)
+                if cached is not None:
+                    return {'arrays': cached[0], 'metadata': cached[1]}
+            with self.open_file() as file_handle:
+                with self.profiler.stage('parse'):
                     result = self._parse(file_handle)
         except (OSError, IOError):
             return self.exit_codes.ERROR_READING_OUTPUT_FILE
         if result is None:
             return self.exit_codes.ERROR_INVALID_OUTPUT
+        if cache is not None:
+            with self.profiler.stage('cache'):
+                cache.put(cache_key, result['arrays'], result['metadata'])
 
         return result
 
+    @contextmanager
+    def open_file(self):
+        """
+        Open the file, in binary mode if `binary` is set and in text mode otherwise.
+
+        Compressed files are detected from their first bytes and decompressed while they are read.
+        """
+        with self.profiler.stage('open'):
+            raw_handle = self.folder.open(self.filename, 'rb')
+        with raw_handle:
+            file_handle = open_decompressed(raw_handle)
+            if not self.binary:
+                file_handle = io.TextIOWrapper(file_handle)
+            with file_handle:
+                yield file_handle
+
     def _parse(self, file_handle):
-        """The function that takes care of the actual parsing."""
+        """
+        The function that takes care of the actual parsing.
+
+        Should return a dictionary with the entries `arrays`, a dictionary of NumPy arrays,
+        and `metadata`, a dictionary that can be stored in a Dict node.
+        """
 
         raise NotImplementedError
+
+
+def compose_result(arrays, metadata, profiler=None, segment_rows=None):
+    """
+    Compose the data and metadata nodes from a dictionary of arrays and the metadata dictionary.
+
+    If an enabled profiler is given, its stages are stored under `profile` in the metadata. If
+    `segment_rows` is given, the arrays with one row per time are stored in segments of that many
+    rows, see :mod:`aiida_logger.utils.segments`. The time range, number of rows, channels and
+    labels are stored as attributes of the data, see :mod:`aiida_logger.utils.query`.
+    """
+    profiler = profiler or StageProfiler()
+    attributes = summary_attributes(arrays, metadata)
+    if segment_rows:
+        arrays = segment_arrays(arrays, segment_rows, unsegmented=(INJECTION_INDEX, ))
+    array_data = DataFactory('array')()
+    for name, array in arrays.items():
+        with profiler.stage('set_array', rows=len(array) if array.ndim else 1):
+            array_data.set_array(name, array)
+    for key, value in attributes.items():
+        array_data.set_attribute(key, value)
+    if profiler.enabled:
+        metadata = dict(metadata)
+        metadata['profile'] = profiler.as_dict()
+    return {'data': array_data, 'metadata': DataFactory('dict')(dict=metadata)}
+
+
+def map_file(file_handle):
+    """
+    Memory map a file handle that is backed by a local uncompressed file.
+
+    :param file_handle: a file handle opened in binary mode.
+    :return: a read only memory map of the whole file, or None if the handle is not backed by a
+        local file, e.g. for decompressed streams, or if the file is empty.
+    """
+    if not isinstance(getattr(file_handle, 'raw', None), io.FileIO):
+        return None
+    try:
+        fileno = file_handle.fileno()
+        if not os.fstat(fileno).st_size:
+            return None
+        return mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError, io.UnsupportedOperation):
+        return None
+
+
+def read_line_chunks(file_handle, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Read the file handle in chunks of a fixed size and yield lists of complete lines.
+
+    The lines are yielded without their line endings. Only one chunk and the incomplete
+    line at its end is kept in memory at a time.
+    """
+    remainder = None
+    while True:
+        chunk = file_handle.read(chunk_size)
+        if not chunk:
+            break
+        if remainder:
+            chunk = remainder + chunk
+        lines = chunk.split(b'\n' if isinstance(chunk, bytes) else '\n')
+        remainder = lines.pop()
+        if lines:
+            yield lines
+    if remainder:
+        yield [remainder]
@@ -0,0 +1,138 @@
+"""
+Cache of parsed results.
+
+------------------------
+The arrays and metadata produced by the file parsers are stored on disk, keyed on a
+hash of the file content and a canonical hash of the parameters that influence the
+parsing. Resubmitting the same file with the same parameters then reuses the
+previous result instead of parsing the file again.
+
+Entries are written to a temporary file and moved in place, such that several
+daemon workers can use the same cache directory at the same time. The least
+recently used entries are evicted when the cache grows beyond its maximum size.
+"""
+from __future__ import absolute_import
+
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+
+# Environment variable that can be used to set the cache directory
+CACHE_DIRECTORY_VARIABLE = 'AIIDA_LOGGER_CACHE_DIR'
+DEFAULT_MAX_SIZE = 1 << 30
+# Parameters that cannot influence the parsed result, the engine and memory mapping are part
+# of the key since the engines may differ, e.g. in how they handle malformed rows
+IGNORED_PARAMETERS = ('cache', 'chunk_size', 'index', 'profile', 'segment_rows', 'workers')
+# Bump when the content of the cache entries changes
+_CACHE_VERSION = 2
+_METADATA_KEY = '__metadata__'
+_HASH_BLOCK_SIZE = 1 << 20
+
+
+class ParseCache():
+    """On-disk cache of parsed arrays and metadata."""
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+        if not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_parameters(cls, parameters):
+        """
+        Create a cache from the `cache` entry in the parameters.
+
+        The entry can either be a boolean or a dictionary with the keys `directory` and `max_size`
+        (in bytes). Returns None if caching is not enabled.
+        """
+        try:
+            settings = parameters['cache']
+        except (KeyError, TypeError):
+            return None
+        if not settings:
+            return None
+        if not isinstance(settings, dict):
+            settings = {}
+        directory = settings.get('directory', os.environ.get(CACHE_DIRECTORY_VARIABLE))
+        if directory is None:
+            directory = os.path.join(os.path.expanduser('~'), '.cache', 'aiida-logger')
+
+        return cls(directory, settings.get('max_size', DEFAULT_MAX_SIZE))
+
+    @staticmethod
+    def key(file_hash, parser_name, parameters):
+        """Compose the cache key from the hash of the file content, the parser and its parameters."""
+        relevant = {key: value for key, value in parameters.items() if key not in IGNORED_PARAMETERS}
+        canonical = json.dumps([_CACHE_VERSION, parser_name, relevant], sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256((file_hash + canonical).encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.npz')
+
+    def get(self, key):
+        """
+        Fetch an entry from the cache.
+
+        :return: a tuple with a dictionary of arrays and the metadata dictionary, or None if there is no entry.
+        """
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as content:
+                arrays = {name: content[name] for name in content.files if name != _METADATA_KEY}
+                metadata = json.loads(str(content[_METADATA_KEY]))
+            # Mark the entry as recently used
+            os.utime(path, None)
+        except (OSError, IOError, KeyError, ValueError, zipfile.BadZipFile):
+            # Missing, evicted in the meantime or incomplete
+            return None
+
+        return arrays, metadata
+
+    def put(self, key, arrays, metadata):
+        """Store the arrays and metadata in the cache and evict old entries if needed."""
+        content = dict(arrays)
+        content[_METADATA_KEY] = np.array(json.dumps(metadata))
+        handle, temporary_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as file_handle:
+                np.savez(file_handle, **content)
+            os.replace(temporary_path, self._path(key))
+        except (OSError, IOError):
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            return
+        self.evict()
+
+    def evict(self):
+        """Remove the least recently used entries until the cache is within its maximum size."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.npz'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except (OSError, IOError):
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        total_size = sum(entry[1] for entry in entries)
+        for _, size, name in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except (OSError, IOError):
+                # Already removed by another worker
+                pass
+            total_size = total_size - size
+
+
+def hash_file(file_handle):
+    """Return the SHA-256 hash of the content of a binary file handle, read in blocks."""
+    file_hash = hashlib.sha256()
+    for block in iter(lambda: file_handle.read(_HASH_BLOCK_SIZE), b''):
+        file_hash.update(block)
+    return file_hash.hexdigest()
@@ -0,0 +1,67 @@
+"""
+Streaming decompression of datafiles.
+
+-------------------------------------
+Compressed datafiles are detected from the magic bytes at their start and decompressed
+while they are read, such that neither the decompressed file nor its full content is
+ever materialized. Gzip, bzip2 and xz are supported by the standard library, zstandard
+is supported when the `zstandard` package is installed.
+"""
+from __future__ import absolute_import
+
+import io
+
+# Magic bytes at the start of compressed files and the name of the compression
+MAGIC_BYTES = (
+    (b'\x1f\x8b', 'gzip'),
+    (b'BZh', 'bz2'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'\x28\xb5\x2f\xfd', 'zstd'),
+)
+MAX_MAGIC_LENGTH = max(len(magic) for magic, _ in MAGIC_BYTES)
+
+
+def detect_compression(file_handle):
+    """
+    Detect the compression of a binary file handle from its first bytes, without consuming them.
+
+    :return: the name of the compression, or None if the content is not compressed.
+    """
+    if hasattr(file_handle, 'peek'):
+        head = file_handle.peek(MAX_MAGIC_LENGTH)[:MAX_MAGIC_LENGTH]
+    else:
+        head = file_handle.read(MAX_MAGIC_LENGTH)
+        file_handle.seek(0)
+    for magic, compression in MAGIC_BYTES:
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def open_decompressed(file_handle):
+    """
+    Wrap a binary file handle in a streaming decompressor if its content is compressed.
+
+    Closing the returned handle does not close `file_handle`.
+
+    :param file_handle: a file handle opened in binary mode.
+    :return: a binary file handle giving the decompressed content, or `file_handle` itself
+        if the content is not compressed.
+    """
+    compression = detect_compression(file_handle)
+    if compression is None:
+        return file_handle
+    if compression == 'gzip':
+        import gzip
+        return gzip.GzipFile(fileobj=file_handle, mode='rb')
+    if compression == 'bz2':
+        import bz2
+        return bz2.BZ2File(file_handle, mode='rb')
+    if compression == 'xz':
+        import lzma
+        return lzma.LZMAFile(file_handle, mode='rb')
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError('The datafile is compressed with zstandard, please install the zstandard package.')
+    return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(file_handle, closefd=False))
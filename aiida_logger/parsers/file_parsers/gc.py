@@ -1,21 +1,413 @@
 from __future__ import absolute_import
 
 from __future__ import print_function
-from aiida.plugins import DataFactory
-from dateutil import parser
+import io
+import warnings
+
 import numpy as np
 
-from aiida_logger.parsers.file_parsers.base import BaseFileParser
+from aiida_logger.parsers.file_parsers.base import BaseFileParser, DEFAULT_CHUNK_SIZE, map_file, read_line_chunks
+from aiida_logger.parsers.file_parsers.index import (DEFAULT_INDEX_INTERVAL, RowIndex, RowSelection, matches_tail,
+                                                     tail_record)
+from aiida_logger.parsers.file_parsers.layout import compile_layout
+from aiida_logger.parsers.file_parsers.sniffer import sniff_file
+from aiida_logger.parsers.file_parsers.timestamps import TimestampDecoder, from_isoformat, to_isoformat, to_seconds
+from aiida_logger.utils.array import GrowableArray, to_structured
+from aiida_logger.utils.injections import INJECTION_INDEX, build_injection_index
+from aiida_logger.utils.statistics import ColumnStatistics
 from six.moves import range
 
+# The dtypes of the time, float64 seconds since the first row or int64 nanoseconds since the epoch
+TIME_DTYPES = ('float64', 'int64')
+# The bytes that separate numbers when the numeric fields are converted in one go
+_WHITESPACE = np.frombuffer(b' \t\n\r\x0b\x0c', dtype=np.uint8)
+
 
 class GCParser(BaseFileParser):  # pylint: disable=too-many-locals
-    """Parser class for parsing data from gas chromatographs."""
+    """
+    Parser class for parsing data from gas chromatographs.
+
+    Two engines are available and selected with the `engine` entry in the parameters:
+    `vectorized` (default) compiles the data layout into absolute column indices and
+    converts the numeric block in bulk, while `reference` walks every line in Python
+    and is kept in order to compare against. Local uncompressed files are memory mapped
+    by the vectorized engine, unless `memory_map` is set to False in the parameters.
+
+    A `projection` in the parameters names the channels, and the labels of each, to keep,
+    e.g. `{'channel_1': ['He area', 'H2 area']}`. The vectorized engine then only tokenizes
+    and converts those columns. See :func:`compile_layout` for the details.
+
+    The count, NaN count, minimum, maximum, mean, standard deviation, first and last value
+    of every data column are computed while the rows are converted and stored in the metadata
+    under `statistics`, keyed by the channel and the label, unless `statistics` is False in the
+    parameters.
+
+    If `structured` is True in the parameters, each channel is stored as a structured array
+    with the labels as fields, e.g. `data.get_array('channel_1')['He area']`, instead of a two
+    dimensional array. The fields are a view of the converted rows, so no data is copied.
+
+    The sample id of every row is stored as `id`, together with an `injection_index` of the
+    rows of the injections of each sample, see :mod:`aiida_logger.utils.injections`.
+
+    If the `data_layout` is `auto` or not given, it is sniffed from the header rows of
+    the file together with the separator and data start line, unless these are given.
+    The sniffed data layout is then stored in the metadata.
+
+    The vectorized engine converts the data and the sample id to the dtypes given in the
+    data layout, e.g. `float32` and `int32`, see :mod:`layout`. The `time` is stored as
+    float64 seconds since the first row, or as int64 nanoseconds since the epoch in UTC if
+    `time_dtype` is `int64` in the parameters.
+    """
     def __init__(self, *args, **kwargs):
         super(GCParser, self).__init__(*args, **kwargs)
+        # Decoding is done by the engines, such that local files can be memory mapped
+        self.binary = True
 
-    def _parse(self, file_handle):  # pylint: disable=too-many-locals
+    def _parse(self, file_handle):
         """Parse the content of GC file as a NumPy array."""
+        try:
+            engine = self.parameters['engine']
+        except KeyError:
+            engine = 'vectorized'
+        if engine not in ('vectorized', 'reference'):
+            raise ValueError('Unknown engine {}, please use vectorized or reference.'.format(engine))
+
+        try:
+            data_layout = self.parameters['data_layout']
+        except KeyError:
+            data_layout = 'auto'
+        sniffed = data_layout == 'auto'
+        if sniffed:
+            self._sniff_layout()
+
+        # Only keep the channels and labels named in the projection
+        try:
+            projection = self.parameters['projection']
+        except KeyError:
+            projection = None
+
+        if engine == 'vectorized':
+            result = self._parse_vectorized(file_handle)
+        else:
+            result = self._parse_reference(io.TextIOWrapper(file_handle))
+            if projection is not None:
+                result = project_result(result, self.parameters['data_layout'], projection)
+            if self._statistics_enabled():
+                result['metadata']['statistics'] = series_statistics(result['arrays'], result['metadata']['labels'])
+        try:
+            structured = self.parameters['structured']
+        except KeyError:
+            structured = False
+        if structured:
+            # View each channel as a structured array with the labels as fields
+            channels = [name for name in result['arrays'] if name.startswith('channel_')]
+            for name, labels in zip(channels, result['metadata']['labels']):
+                if labels:
+                    result['arrays'][name] = to_structured(result['arrays'][name], labels)
+        # Index the runs of injections of each sample
+        result['arrays'][INJECTION_INDEX] = build_injection_index(result['arrays']['id'])
+        if sniffed:
+            result['metadata']['data_layout'] = self.parameters['data_layout']
+        if projection is not None:
+            result['metadata']['channels'] = [name for name in result['arrays'] if name.startswith('channel_')]
+        return result
+
+    def _statistics_enabled(self):
+        """Return whether the statistics of the columns are computed, which is the default."""
+        try:
+            return self.parameters['statistics']
+        except KeyError:
+            return True
+
+    def _sniff_layout(self):
+        """
+        Sniff the data layout, and the separator and data start line unless given, from the header rows.
+
+        The start of the file is read from a separate handle, as compressed streams cannot be rewound cheaply.
+        """
+        with self.profiler.stage('sniff'):
+            with self.open_file() as head_handle:
+                sniffed = sniff_file(io.TextIOWrapper(head_handle))
+        self.parameters['data_layout'] = sniffed['data_layout']
+        for key in ('separator', 'data_start_line'):
+            if key not in self.parameters:
+                self.parameters[key] = sniffed[key]
+
+    def _parse_vectorized(self, file_handle):  # pylint: disable=too-many-locals
+        """
+        Parse the content of GC file by slicing a compiled column plan out of blocks of lines.
+
+        When the file is a local uncompressed file, it is memory mapped and the line and field
+        boundaries are located on the raw bytes, such that the numeric fields are converted
+        without creating a string for each field. Otherwise the file is streamed in chunks of
+        `chunk_size` characters. In both cases the converted rows are appended to preallocated
+        buffers, such that the memory usage does not depend on how many lines the file has
+        beyond the size of the parsed arrays.
+        """
+
+        # Set the separator
+        try:
+            separator = self.parameters['separator']
+        except KeyError:
+            separator = ' '
+
+        # Set the size of the chunks read at a time
+        try:
+            chunk_size = self.parameters['chunk_size']
+        except KeyError:
+            chunk_size = DEFAULT_CHUNK_SIZE
+
+        # Set whether local files are memory mapped
+        try:
+            memory_map = self.parameters['memory_map']
+        except KeyError:
+            memory_map = True
+
+        # Compile the data layout into absolute column indices and dtypes
+        plan = compile_layout(self.parameters['data_layout'], self.parameters.get('projection'))
+        try:
+            time_dtype = self.parameters['time_dtype']
+        except KeyError:
+            time_dtype = 'float64'
+        if time_dtype not in TIME_DTYPES:
+            raise ValueError('Unknown time_dtype {}, please use {}.'.format(time_dtype, ' or '.join(TIME_DTYPES)))
+        data_start_line = self.parameters['data_start_line']
+        comment_line = self._fetch_comment_line()
+
+        # Select a range of rows or a time window, seeking with the index of a previous parse if given
+        selection = RowSelection.from_parameters(self.parameters)
+        try:
+            index_interval = self.parameters['index_interval']
+        except KeyError:
+            index_interval = DEFAULT_INDEX_INTERVAL
+
+        # Record the end of the content for incremental parsing, and continue from a previous record if given
+        try:
+            incremental = self.parameters['incremental']
+        except KeyError:
+            incremental = False
+        previous = self.parameters.get('previous')
+        if incremental and selection.enabled:
+            raise ValueError('An incremental parse can not be combined with a row_range or time_window.')
+
+        header = {'comments': None}
+        buffer = map_file(file_handle) if memory_map and len(separator.encode()) == 1 else None
+        row_number = 0
+        file_start = None
+        delta = False
+        if incremental and buffer is None:
+            raise ValueError('An incremental parse needs an uncompressed local datafile that can be memory mapped.')
+        if buffer is not None:
+            size = len(buffer)
+            byte_range = (None, None)
+            if incremental and matches_tail(previous, buffer):
+                # Only parse the rows appended since the previous parse
+                delta = True
+                byte_range = (previous['offset'], None)
+                row_number = previous['rows']
+                file_start = from_isoformat(previous['start_time'])
+            elif selection.enabled:
+                seek = selection.seek(self.parameters.get('index'), size)
+                if seek is not None:
+                    byte_range = seek[:2]
+                    row_number = seek[2]
+                    file_start = from_isoformat(self.parameters['index']['start_time'])
+            blocks = self._buffer_blocks(buffer, separator, chunk_size, plan, data_start_line, comment_line, header,
+                                         byte_range)
+        else:
+            blocks = self._line_blocks(io.TextIOWrapper(file_handle), separator, chunk_size, plan, data_start_line,
+                                       comment_line, header)
+        # The index is built when the whole file is read from a memory map
+        row_index = None
+        if buffer is not None and index_interval and not selection.enabled and not delta:
+            row_index = RowIndex(index_interval)
+
+        # The times of a delta are relative to the first row of the file, as for the full parse
+        reference_time = file_start if delta else None
+        decoder = TimestampDecoder(plan.time_format)
+        date_time = GrowableArray(dtype=time_dtype)
+        sample_id = GrowableArray(dtype=plan.id_dtype)
+        data = [GrowableArray(shape=(len(channel.data_columns), ), dtype=channel.dtype) for channel in plan.channels]
+        statistics = None
+        if self._statistics_enabled():
+            statistics = [ColumnStatistics(len(channel.data_columns)) for channel in plan.channels]
+        try:
+            for time_column, id_column, values, offsets in blocks:
+                rows = np.arange(row_number, row_number + len(time_column))
+                row_number = row_number + len(time_column)
+                if file_start is None:
+                    file_start = decoder.decode(time_column[:1])[0]
+                if selection.enabled:
+                    # Select by row number before the timestamps are decoded
+                    mask = selection.row_mask(rows)
+                    if not mask.any():
+                        if selection.last_row is not None and rows[0] >= selection.last_row:
+                            break
+                        continue
+                    rows, time_column, id_column = rows[mask], time_column[mask], id_column[mask]
+                    values = [channel_values[mask] for channel_values in values]
+
+                # Convert time and sample id, which are assumed to be the same between channels
+                with self.profiler.stage('timestamps', rows=len(time_column)):
+                    times = decoder.decode(time_column)
+                if row_index is not None:
+                    row_index.add(rows, offsets, to_seconds(times, file_start))
+                past = False
+                if selection.enabled:
+                    past = selection.is_past(rows[-1], times[-1], file_start)
+                    mask = selection.time_mask(times, file_start)
+                    times, id_column = times[mask], id_column[mask]
+                    values = [channel_values[mask] for channel_values in values]
+                if len(times):
+                    if reference_time is None:
+                        reference_time = times[0]
+                    self._append_block(times, id_column, values, date_time, sample_id, data, reference_time)
+                    if statistics is not None:
+                        # Update the statistics from the converted rows that were just appended
+                        with self.profiler.stage('statistics', rows=len(times)):
+                            for channel_statistics, channel_data in zip(statistics, data):
+                                channel_statistics.add(channel_data.to_array()[-len(times):])
+                if past:
+                    break
+            if incremental:
+                tail = tail_record(buffer, row_number, to_isoformat(file_start) if file_start is not None else None)
+        finally:
+            if buffer is not None:
+                close_map(buffer)
+
+        if not date_time and not delta:
+            if selection.enabled:
+                raise ValueError('No data rows were selected by the row_range and time_window in the parameters.')
+            raise ValueError('No data lines were found. Please check the data_start_line in the parameters.')
+
+        # Compose data, time and metadata
+        arrays = {}
+        for channel, channel_data in zip(plan.channels, data):
+            arrays[channel.name] = channel_data.to_array()
+        arrays['time'] = date_time.to_array()
+        arrays['id'] = sample_id.to_array()
+        meta = {
+            'start_time': to_isoformat(reference_time),
+            'comments': header['comments'],
+            'labels': plan.labels
+        }
+        if statistics is not None:
+            meta['statistics'] = {
+                channel.name: channel_statistics.as_dict(channel.labels)
+                for channel, channel_statistics in zip(plan.channels, statistics)
+            }
+        if row_index is not None:
+            meta['index'] = row_index.as_dict(to_isoformat(file_start), size)
+        if incremental:
+            meta['tail'] = tail
+            # The number of the first row in the data, which is not zero for a delta
+            meta['first_row'] = previous['rows'] if delta else 0
+        return {'arrays': arrays, 'metadata': meta}
+
+    def _append_block(self, times, id_column, values, date_time, sample_id, data, reference_time):  # pylint: disable=too-many-arguments
+        """
+        Append the times, the sample ids and the data of a block.
+
+        The times are converted to seconds relative to the reference time, or to nanoseconds since
+        the epoch if the time buffer is int64, and the values are converted to the dtypes of the buffers.
+        """
+        if date_time.dtype == np.int64:
+            date_time.append(times.view(np.int64))
+        else:
+            # Calculate time difference for each step and store that instead of absolute times
+            date_time.append(to_seconds(times, reference_time))
+        sample_id.append(convert_sample_id(id_column, sample_id.dtype))
+
+        # Convert from string to target data for each channel directly into the buffers
+        with self.profiler.stage('convert', rows=len(times)):
+            for channel_values, channel_data in zip(values, data):
+                try:
+                    channel_data.append(channel_values)
+                except ValueError as e:
+                    raise ValueError('A field with an empty string might have been detected. Are you sure you '
+                                     'have specified correct ignore fields in the parameters?') from e
+
+    def _line_blocks(self, file_handle, separator, chunk_size, plan, data_start_line, comment_line, header):  # pylint: disable=too-many-arguments
+        """
+        Stream the file in chunks of lines and yield the time, id and data columns of each chunk as strings.
+
+        The byte offsets of the rows are not known when reading text and are yielded as None.
+        The comment line is stored in `header` when it is passed.
+        """
+        line_number = 0
+        chunks = read_line_chunks(file_handle, chunk_size)
+        while True:
+            with self.profiler.stage('read'):
+                lines = next(chunks, None)
+            if lines is None:
+                break
+            self.profiler.add_rows('read', len(lines))
+            first_line_number = line_number
+            line_number = line_number + len(lines)
+            if comment_line is not None and first_line_number <= comment_line < line_number:
+                header['comments'] = lines[comment_line - first_line_number]
+            if line_number <= data_start_line:
+                continue
+
+            # Tokenize the data lines of this chunk into one block of strings
+            with self.profiler.stage('tokenize'):
+                block = tokenize(lines[max(data_start_line - first_line_number, 0):], separator, plan.num_columns)
+            self.profiler.add_rows('tokenize', len(block))
+            if not block.size:
+                continue
+            yield block[:, plan.time_column], block[:, plan.id_column], [
+                block[:, channel.data_columns] for channel in plan.channels
+            ], None
+
+    def _buffer_blocks(self, buffer, separator, chunk_size, plan, data_start_line, comment_line, header,  # pylint: disable=too-many-arguments
+                       byte_range=(None, None)):
+        """
+        Tokenize a memory mapped file in blocks of about `chunk_size` bytes.
+
+        Yields the time and id columns of each block as strings, the data columns of each
+        channel as floats and the byte offsets of the rows. The comment line is stored in
+        `header` when it is passed. If the start of the `byte_range` is given, the data
+        lines before it are skipped, and if its end is given, the lines from it are.
+        """
+        # Skip the header lines, which are few, one at a time
+        start = 0
+        for line_number in range(data_start_line):
+            end = buffer.find(b'\n', start)
+            if end < 0:
+                return
+            if line_number == comment_line:
+                header['comments'] = buffer[start:end].decode().rstrip('\r')
+            start = end + 1
+
+        start = max(start, byte_range[0] or 0)
+        stop = len(buffer) if byte_range[1] is None else byte_range[1]
+        separator = separator.encode()
+        while start < stop:
+            with self.profiler.stage('read'):
+                end = buffer.find(b'\n', start + chunk_size, stop)
+                end = stop if end < 0 else end + 1
+            with self.profiler.stage('tokenize'):
+                block = tokenize_buffer(buffer, start, end, separator, plan)
+            self.profiler.add_rows('read', len(block[0]))
+            self.profiler.add_rows('tokenize', len(block[0]))
+            start = end
+            if len(block[0]):
+                yield block
+
+    def _fetch_comment_line(self):
+        """Fetch the line number of the comments if a comment range is specified."""
+        try:
+            comment_range = self.parameters['comment_range']
+        except KeyError:
+            return None
+        if '-' not in comment_range and ',' not in comment_range:
+            # Only comments on one line
+            return int(comment_range)
+        raise NotImplementedError
+
+    def _parse_reference(self, file_handle):  # pylint: disable=too-many-locals
+        """Parse the content of GC file line by line, which serves as the reference implementation."""
+        from dateutil import parser
 
         # Set the separator
         try:
@@ -139,17 +531,199 @@ class GCParser(BaseFileParser):  # pylint: disable=too-many-locals
         reference_time = date_time[0]
         date_time = [(time - reference_time).total_seconds()
                      for time in date_time]
-        # Compose data, time and metadata nodes
-        array_data = DataFactory('array')()
+        # Compose data, time and metadata
+        arrays = {}
         for channel in range(num_channels):
-            array_data.set_array('channel_'+str(channel + 1), np.array(data[channel]))
-        array_data.set_array('time', np.array(date_time))
-        array_data.set_array('id', np.array(sample_id[channel]))
-        meta = DataFactory('dict')(dict={
+            arrays['channel_'+str(channel + 1)] = np.array(data[channel])
+        arrays['time'] = np.array(date_time)
+        arrays['id'] = np.array(sample_id)
+        meta = {
             # Consider to replace the string conversion in the future
             # problem is that we also need timzone information.
-            'start_time': str(reference_time.utcnow()),
+            'start_time': str(reference_time),
             'comments': comments,
             'labels': labels
-        })
-        return {'data': array_data, 'metadata': meta}
+        }
+        return {'arrays': arrays, 'metadata': meta}
+
+
+def project_result(result, data_layout, projection):
+    """Keep only the channels and labels named in the projection in a result of the reference engine."""
+    plan = compile_layout(data_layout)
+    projected = compile_layout(data_layout, projection)
+    arrays = {name: array for name, array in result['arrays'].items() if not name.startswith('channel_')}
+    labels = []
+    for channel in projected.channels:
+        full_labels = plan.channels[[item.name for item in plan.channels].index(channel.name)].labels
+        arrays[channel.name] = result['arrays'][channel.name][:, [full_labels.index(label) for label in channel.labels]]
+        labels.append(channel.labels)
+    metadata = dict(result['metadata'])
+    metadata['labels'] = labels
+
+    return {'arrays': arrays, 'metadata': metadata}
+
+
+def series_statistics(arrays, labels):
+    """Compute the statistics of the columns of each channel of a result in one go."""
+    statistics = {}
+    for name, channel_labels in zip([name for name in arrays if name.startswith('channel_')], labels):
+        channel_statistics = ColumnStatistics(len(channel_labels))
+        channel_statistics.add(arrays[name].reshape(-1, len(channel_labels)))
+        statistics[name] = channel_statistics.as_dict(channel_labels)
+    return statistics
+
+
+def close_map(buffer):
+    """
+    Close a memory map, unless views of it are still referenced.
+
+    This happens when an error is raised while a block is tokenized, as the traceback of the error
+    references the views. The map is then closed when the views are released, such that the error
+    is raised instead of a BufferError.
+    """
+    try:
+        buffer.close()
+    except BufferError:
+        pass
+
+
+def tokenize(lines, separator, num_columns):
+    """
+    Split data lines into a two dimensional array of strings.
+
+    Blank lines are skipped and trailing columns beyond `num_columns` are discarded.
+    """
+    rows = []
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if not line.strip():
+            continue
+        rows.append(line.split(separator, num_columns)[:num_columns])
+    if not rows:
+        return np.empty((0, num_columns), dtype=str)
+    if min(len(row) for row in rows) < num_columns:
+        raise ValueError('Detected lines with less than the {} columns specified in the data layout.'.format(num_columns))
+
+    return np.array(rows)
+
+
+def convert_sample_id(column, dtype=np.int64):
+    """
+    Convert a column of sample id strings to integers, where invalid entries are set to zero.
+
+    :raises ValueError: if a sample id does not fit in the dtype, instead of truncating it.
+    """
+    try:
+        sample_id = np.char.strip(column).astype(np.int64)
+    except ValueError:
+        sample_id = []
+        for item in column:
+            try:
+                s_id = int(item.strip())
+            except ValueError:
+                s_id = 0
+            sample_id.append(s_id)
+        sample_id = np.array(sample_id, dtype=np.int64)
+    dtype = np.dtype(dtype)
+    if dtype != sample_id.dtype and len(sample_id):
+        limits = np.iinfo(dtype)
+        if sample_id.min() < limits.min or sample_id.max() > limits.max:
+            raise ValueError('Detected sample ids that do not fit in {}, please use int64 for the id in the data '
+                             'layout.'.format(dtype))
+    return sample_id.astype(dtype)
+
+
+def tokenize_buffer(buffer, start, end, separator, plan):  # pylint: disable=too-many-locals
+    """
+    Tokenize the data lines between two byte offsets of a buffer.
+
+    The line and field boundaries are located with NumPy on the raw bytes. The numeric fields
+    of all channels are gathered into one string of space separated numbers, which is converted
+    in one call, such that no string is created per field. Only the time and id fields are
+    decoded to strings. Blank lines are skipped and trailing columns beyond those in the plan
+    are discarded.
+
+    :param buffer: a buffer, e.g. a memory map, with the content of the file.
+    :param start: the offset of the first byte of the first line.
+    :param end: the offset after the last byte of the last line.
+    :param separator: the separator as a single byte.
+    :param plan: the compiled :class:`ColumnPlan`.
+    :return: the time and id columns as string arrays, a list with a float array of the data of each channel,
+        in the dtype of the channels if they all have the same, and the byte offsets of the start of the rows.
+    """
+    data = np.frombuffer(buffer, dtype=np.uint8, count=end - start, offset=start)
+    is_separator = data == ord(separator)
+    is_newline = data == ord('\n')
+
+    # Locate the lines, without their line endings
+    ends = np.flatnonzero(is_newline)
+    if not len(data) or data[-1] != ord('\n'):
+        ends = np.append(ends, len(data))
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    ends = ends - ((ends > starts) & (data[np.maximum(ends - 1, 0)] == ord('\r')))
+
+    # Locate the separators of each line and skip the blank lines
+    separators = np.flatnonzero(is_separator)
+    first = np.searchsorted(separators, starts)
+    counts = np.searchsorted(separators, ends) - first
+    blank = np.zeros(len(starts), dtype=bool)
+    for index in np.flatnonzero(counts == 0):
+        blank[index] = not bytes(data[starts[index]:ends[index]]).strip()
+    if (counts[~blank] < plan.num_columns - 1).any():
+        raise ValueError('Detected lines with less than the {} columns specified in the data layout.'.format(
+            plan.num_columns))
+    rows = np.flatnonzero(~blank)
+
+    # The column of each byte is the number of separators before it on its line
+    line_first = np.zeros(len(data), dtype=np.int32)
+    line_first[starts] = np.diff(first, prepend=0)
+    columns = np.cumsum(is_separator, dtype=np.int32) - is_separator - np.cumsum(line_first, dtype=np.int32)
+
+    # Blank out all bytes but those of the numeric fields and convert them in one go
+    data_columns = np.concatenate([channel.data_columns for channel in plan.channels]).astype(np.int64)
+    selected = np.zeros(plan.num_columns + 1, dtype=bool)
+    selected[data_columns] = True
+    keep = selected[np.minimum(columns, plan.num_columns)] & ~is_separator & ~is_newline & (data != ord('\r'))
+    text = np.where(keep, data, np.uint8(ord(' '))).tobytes()
+    # Convert directly to the dtype of the channels if they share one, e.g. float32, such that no
+    # float64 copy of the block is made. Otherwise the channels are cast when they are appended.
+    dtypes = {np.dtype(channel.dtype) for channel in plan.channels}
+    dtype = dtypes.pop() if len(dtypes) == 1 else np.float64
+    with warnings.catch_warnings():
+        # Content that is not numeric ends the conversion early, which is detected below
+        warnings.simplefilter('ignore', DeprecationWarning)
+        values = np.fromstring(text, dtype=dtype, sep=' ')
+    # Every numeric field must hold exactly one number. Only checking the number of values of the
+    # block lets a field with a space cancel out an empty field in another row, shifting the values.
+    characters = np.frombuffer(text, dtype=np.uint8)
+    is_token = ~np.isin(characters, _WHITESPACE)
+    token_starts = np.flatnonzero(is_token & ~np.concatenate(([False], is_token[:-1])))
+    lines = np.cumsum(is_newline, dtype=np.int64) - is_newline
+    tokens = np.bincount(lines[token_starts] * (plan.num_columns + 1) + np.minimum(columns[token_starts],
+                                                                                  plan.num_columns),
+                         minlength=len(starts) * (plan.num_columns + 1)).reshape(len(starts), plan.num_columns + 1)
+    if len(values) != len(rows) * len(data_columns) or (tokens[rows][:, data_columns] != 1).any():
+        raise ValueError('A field with an empty string might have been detected. Are you sure you '
+                         'have specified correct ignore fields in the parameters?')
+    values = values.reshape(len(rows), len(data_columns))
+    order = np.argsort(data_columns, kind='stable')
+    position = np.empty_like(order)
+    position[order] = np.arange(len(order))
+    channel_values = []
+    offset = 0
+    for channel in plan.channels:
+        channel_values.append(values[:, position[offset:offset + len(channel.data_columns)]])
+        offset = offset + len(channel.data_columns)
+
+    def field(column):
+        """Decode one column of the rows to strings."""
+        field_starts = starts[rows] if column == 0 else separators[first[rows] + column - 1] + 1
+        field_ends = np.where(counts[rows] > column, separators[np.minimum(first[rows] + column,
+                                                                           len(separators) - 1)], ends[rows])
+        # Gather the bytes of the fields into a fixed width array, padded with zeros
+        width = max(int((field_ends - field_starts).max(initial=0)), 1)
+        indices = field_starts[:, np.newaxis] + np.arange(width)
+        characters = np.where(indices < field_ends[:, np.newaxis], data[np.minimum(indices, len(data) - 1)], 0)
+        return np.char.decode(np.ascontiguousarray(characters, dtype=np.uint8).view('S{}'.format(width)).ravel())
+
+    return field(plan.time_column), field(plan.id_column), channel_values, start + starts[rows]
@@ -0,0 +1,189 @@
+"""
+Sparse row index, row selection and incremental parsing.
+
+--------------------------------------------------------
+While a file is parsed, the byte offset and time of every `index_interval` data row are
+recorded in a sparse index that is stored with the metadata. When the index is passed
+back in the parameters of a later parse, together with a `row_range` or `time_window`,
+the parser seeks directly to the part of the file that holds the selected rows instead
+of reading it from the start.
+
+Similarly, an incremental parse records the end of the parsed content in a tail record.
+When the tail record is passed back as `previous`, only the rows appended to the file
+since then are parsed, provided the hash of the content up to the recorded end is unchanged.
+"""
+from __future__ import absolute_import
+
+import hashlib
+
+import numpy as np
+
+from aiida_logger.parsers.file_parsers.timestamps import from_isoformat
+
+# Default number of data rows between the entries of the index
+DEFAULT_INDEX_INTERVAL = 10000
+
+
+class RowIndex():
+    """Builder of the sparse index of the data rows of a file."""
+    def __init__(self, interval=DEFAULT_INDEX_INTERVAL):
+        self.interval = interval
+        self.rows = []
+        self.offsets = []
+        self.seconds = []
+
+    def add(self, rows, offsets, seconds):
+        """
+        Record the rows of a block that fall on the interval.
+
+        :param rows: the row numbers of the block.
+        :param offsets: the byte offsets of the start of the rows.
+        :param seconds: the times of the rows in seconds since the first data row.
+        """
+        selected = np.flatnonzero(rows % self.interval == 0)
+        self.rows.extend(rows[selected].tolist())
+        self.offsets.extend(offsets[selected].tolist())
+        self.seconds.extend(seconds[selected].tolist())
+
+    def as_dict(self, start_time, size):
+        """
+        Return the index as a dictionary that can be stored in a Dict node.
+
+        :param start_time: the time of the first data row as an ISO 8601 string.
+        :param size: the size of the file in bytes, used to detect that an index does not belong to a file.
+        """
+        return {
+            'interval': self.interval,
+            'start_time': start_time,
+            'size': size,
+            'rows': self.rows,
+            'offsets': self.offsets,
+            'seconds': self.seconds
+        }
+
+
+class RowSelection():
+    """
+    A selection of data rows by their number and time.
+
+    :param row_range: an optional list with the first and the last, exclusive, row to select, where
+        either can be None to select from the start or to the end.
+    :param time_window: an optional list with the start and the end, exclusive, of the time window to
+        select, each either an ISO 8601 string in UTC, a number of seconds since the first data row
+        or None.
+    """
+    def __init__(self, row_range=None, time_window=None):
+        row_range = row_range or [None, None]
+        time_window = time_window or [None, None]
+        self.first_row = row_range[0] or 0
+        self.last_row = row_range[1]
+        self.start_time, self.end_time = time_window
+        self.enabled = bool(self.first_row or self.last_row is not None or self.start_time is not None
+                            or self.end_time is not None)
+
+    @classmethod
+    def from_parameters(cls, parameters):
+        """Compose the selection from the `row_range` and `time_window` parameters."""
+        return cls(parameters.get('row_range'), parameters.get('time_window'))
+
+    def row_mask(self, rows):
+        """Return a mask of the row numbers that are selected."""
+        mask = rows >= self.first_row
+        if self.last_row is not None:
+            mask = mask & (rows < self.last_row)
+        return mask
+
+    def time_mask(self, times, file_start):
+        """Return a mask of the datetime64 times that are selected, given the time of the first data row."""
+        mask = np.ones(len(times), dtype=bool)
+        if self.start_time is not None:
+            mask = mask & (times >= _absolute(self.start_time, file_start))
+        if self.end_time is not None:
+            mask = mask & (times < _absolute(self.end_time, file_start))
+        return mask
+
+    def is_past(self, last_row, last_time, file_start):
+        """Return whether the rows after the given row and time can not be selected, assuming increasing times."""
+        if self.last_row is not None and last_row + 1 >= self.last_row:
+            return True
+        return self.end_time is not None and last_time >= _absolute(self.end_time, file_start)
+
+    def seek(self, index, size):
+        """
+        Find the part of a file holding the selected rows using its index.
+
+        :param index: the index as returned by :meth:`RowIndex.as_dict`.
+        :param size: the size of the file in bytes.
+        :return: the byte offsets of the start and end of the part, where the end is None for the end
+            of the file, and the number of the row at the start, or None if the index does not belong
+            to the file or is empty.
+        """
+        if not index or index.get('size') != size or not index.get('rows'):
+            return None
+        rows = np.asarray(index['rows'])
+        offsets = np.asarray(index['offsets'])
+        seconds = np.asarray(index['seconds'], dtype=np.float64)
+        file_start = from_isoformat(index['start_time'])
+
+        # The last entry at or before the start and the first entry at or after the end of the selection
+        first = np.searchsorted(rows, self.first_row, side='right') - 1
+        last = len(rows)
+        if self.last_row is not None:
+            last = min(last, np.searchsorted(rows, self.last_row, side='left'))
+        if self.start_time is not None:
+            start = _seconds(self.start_time, file_start)
+            first = max(first, np.searchsorted(seconds, start, side='right') - 1)
+        if self.end_time is not None:
+            end = _seconds(self.end_time, file_start)
+            last = min(last, np.searchsorted(seconds, end, side='left'))
+        first = max(first, 0)
+        end_offset = int(offsets[last]) if last < len(rows) else None
+
+        return int(offsets[first]), end_offset, int(rows[first])
+
+
+def _absolute(time, file_start):
+    """Return a time given as an ISO 8601 string or seconds since the start as a datetime64[ns]."""
+    if isinstance(time, str):
+        return from_isoformat(time)
+    return file_start + np.timedelta64(int(round(time * 1e9)), 'ns')
+
+
+def _seconds(time, file_start):
+    """Return a time given as an ISO 8601 string or seconds since the start as seconds since the start."""
+    if isinstance(time, str):
+        return (from_isoformat(time) - file_start) / np.timedelta64(1, 's')
+    return time
+
+
+def tail_record(buffer, rows, start_time):
+    """
+    Compose the record of the end of a parsed file, from which an incremental parse continues.
+
+    :param buffer: a buffer with the content of the file.
+    :param rows: the number of data rows in the file.
+    :param start_time: the time of the first data row as an ISO 8601 string.
+    :return: a dictionary that can be stored in a Dict node.
+    """
+    return {
+        'offset': len(buffer),
+        'rows': rows,
+        'start_time': start_time,
+        'prefix_hash': prefix_hash(buffer, len(buffer)),
+        # An incomplete last line might still be written to
+        'complete': not len(buffer) or buffer[len(buffer) - 1:] == b'\n'
+    }
+
+
+def matches_tail(previous, buffer):
+    """Return whether the file starts with the unchanged content of a previous tail record."""
+    if not previous or not previous.get('complete') or previous['offset'] > len(buffer):
+        return False
+    return prefix_hash(buffer, previous['offset']) == previous['prefix_hash']
+
+
+def prefix_hash(buffer, size):
+    """Return the SHA-256 hash of the first bytes of a buffer without copying them."""
+    with memoryview(buffer) as view:
+        with view[:size] as prefix:
+            return hashlib.sha256(prefix).hexdigest()
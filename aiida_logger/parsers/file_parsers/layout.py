@@ -0,0 +1,181 @@
+"""
+Compilation of data layouts.
+
+----------------------------
+The data layout given in the parameters describes every column of every channel
+in the order they appear in the file. Here it is compiled once into absolute
+column indices, such that the parsers can slice the numeric block directly
+instead of removing entries from each line.
+
+The type given for each column selects the dtype it is converted to. The generic `float`
+and `int` keep the defaults, i.e. float64 for the data and int64 for the sample id, while
+`float32` and `int32` halve the size of the arrays. The data of a channel is stored in one
+array with the widest dtype of its columns.
+"""
+from __future__ import absolute_import
+
+import numpy as np
+
+# The dtypes of the data columns and the sample id for the types in the data layout. Data columns
+# are floating point only, such that no value is truncated, also those given as int
+DATA_DTYPES = {'float': 'float64', 'int': 'float64', 'float64': 'float64', 'float32': 'float32'}
+ID_DTYPES = {'int': 'int64', 'float': 'int64', 'int64': 'int64', 'int32': 'int32'}
+
+
+class ChannelPlan():  # pylint: disable=too-few-public-methods
+    """Absolute column indices and labels of one channel."""
+    def __init__(self,  # pylint: disable=too-many-arguments
+                 name,
+                 time_column,
+                 id_column,
+                 data_columns,
+                 labels,
+                 time_format=None,
+                 dtypes=None,
+                 id_dtype='int64'):
+        self.name = name
+        self.time_column = time_column
+        self.time_format = time_format
+        self.id_column = id_column
+        self.id_dtype = id_dtype
+        self.data_columns = data_columns
+        self.labels = labels
+        self.dtypes = dtypes or ['float64'] * len(data_columns)
+
+    @property
+    def dtype(self):
+        """Return the dtype of the data of the channel, which is the widest of the dtypes of its columns."""
+        if not self.dtypes:
+            return np.dtype(np.float64)
+        return np.result_type(*self.dtypes)
+
+
+class ColumnPlan():
+    """The compiled data layout for all channels in a file."""
+    def __init__(self, channels, num_columns):
+        self.channels = channels
+        self.num_columns = num_columns
+
+    @property
+    def labels(self):
+        """Return the labels of the data columns for each channel."""
+        return [channel.labels for channel in self.channels]
+
+    @property
+    def time_column(self):
+        """Return the absolute index of the time column of the first channel."""
+        return self.channels[0].time_column
+
+    @property
+    def time_format(self):
+        """Return the format of the time column of the first channel."""
+        return self.channels[0].time_format
+
+    @property
+    def id_column(self):
+        """Return the absolute index of the id column of the first channel."""
+        return self.channels[0].id_column
+
+    @property
+    def id_dtype(self):
+        """Return the dtype of the id column of the first channel."""
+        return self.channels[0].id_dtype
+
+
+def compile_layout(data_layout, projection=None):
+    """
+    Compile the data layout into a ColumnPlan.
+
+    :param data_layout: a list with one entry per channel, each a list of single key dictionaries
+        describing the columns of that channel in the order they appear in the file.
+    :param projection: an optional dictionary with the names of the channels to keep, e.g. `channel_1`,
+        and either a list of the labels to keep for that channel or `all`. Channels that are not
+        named are dropped and the columns after the last kept column are not part of the plan.
+    :return: a :class:`ColumnPlan` with absolute column indices.
+    """
+    channels = []
+    start = 0
+    for channel, layout in enumerate(data_layout):
+        time_columns = []
+        time_format = None
+        id_columns = []
+        id_dtype = 'int64'
+        data_columns = []
+        labels = []
+        dtypes = []
+        for index, item in enumerate(layout):
+            key = list(item.keys())[0]
+            if 'time' in item:
+                time_columns.append(start + index)
+                time_format = item['time']
+            elif 'id' in item:
+                id_columns.append(start + index)
+                id_dtype = _dtype(item['id'], ID_DTYPES, 'id')
+            elif 'ignore' in item:
+                continue
+            else:
+                data_columns.append(start + index)
+                labels.append(key)
+                dtypes.append(_dtype(item[key], DATA_DTYPES, key))
+        if len(time_columns) > 1:
+            raise ValueError('More than one time entry per channel. Please correct the configuration.')
+        if len(id_columns) > 1:
+            raise ValueError('More than one id entry per channel. Please correct the configuration.')
+        channels.append(
+            ChannelPlan('channel_' + str(channel + 1), time_columns[0] if time_columns else None,
+                        id_columns[0] if id_columns else None, data_columns, labels, time_format, dtypes, id_dtype))
+        start = start + len(layout)
+
+    if projection is None:
+        return ColumnPlan(channels, start)
+    return project_plan(ColumnPlan(channels, start), projection)
+
+
+def project_plan(plan, projection):
+    """
+    Keep only the channels and labels named in the projection.
+
+    :param plan: a :class:`ColumnPlan`.
+    :param projection: a dictionary with the names of the channels to keep and either a list of
+        the labels to keep for that channel or `all`.
+    :return: a :class:`ColumnPlan` with the kept channels and labels, in the order of the file.
+    """
+    names = [channel.name for channel in plan.channels]
+    unknown = [name for name in projection if name not in names]
+    if unknown:
+        raise ValueError('The projection names the channels {}, which are not in the data layout.'.format(unknown))
+
+    channels = []
+    for channel in plan.channels:
+        if channel.name not in projection:
+            continue
+        labels = projection[channel.name]
+        if labels == 'all':
+            labels = channel.labels
+        missing = [label for label in labels if label not in channel.labels]
+        if missing:
+            raise ValueError('The projection names the labels {}, which are not in {}.'.format(missing, channel.name))
+        # Keep the order of the file
+        indices = [index for index, label in enumerate(channel.labels) if label in labels]
+        channels.append(
+            ChannelPlan(channel.name, channel.time_column, channel.id_column,
+                        [channel.data_columns[index] for index in indices],
+                        [channel.labels[index] for index in indices], channel.time_format,
+                        [channel.dtypes[index] for index in indices], channel.id_dtype))
+    if not channels:
+        raise ValueError('The projection does not keep any channel.')
+
+    # The time and id are read from the first kept channel, so the plan ends at its last needed column
+    used = [channels[0].time_column, channels[0].id_column]
+    for channel in channels:
+        used.extend(channel.data_columns)
+    return ColumnPlan(channels, max(column for column in used if column is not None) + 1)
+
+
+def _dtype(name, dtypes, label):
+    """Return the dtype for the type of a column in the data layout."""
+    try:
+        return dtypes[name]
+    except KeyError:
+        raise ValueError('Unknown type {} of {} in the data layout, please use one of {}.'.format(
+            name, label, ', '.join(dtypes)))
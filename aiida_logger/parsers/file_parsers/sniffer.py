@@ -0,0 +1,178 @@
+"""
+Sniffing of GC headers.
+
+-----------------------
+The exports of the GC start with two header rows. The first names the channel at its
+first column and the species of every data column, the second names the quantity of every
+column, e.g. `Acquisition Date`, `Sample ID`, `ESTD Concentration` or `Area`, and is empty
+for the columns that separate the quantities. Here the separator, the data layout and the
+first data line are derived from these rows and the first data rows, such that new
+instrument configurations can be parsed without writing the data layout by hand. The format
+of the timestamps is the first candidate that matches a sample of the data rows, as the
+day and month of the first rows are often both valid as either.
+"""
+from __future__ import absolute_import
+
+from datetime import datetime
+
+# Number of characters read from the start of the file at a time while sniffing
+SNIFF_SIZE = 1 << 12
+# Give up if the header is not found within this number of characters
+MAX_SNIFF_SIZE = 1 << 16
+# Candidate separators, in order of preference
+SEPARATORS = ('\t', ';', ',', ' ')
+# Candidate formats of the date and time of day, tried on the first data rows
+TIME_FORMATS = ('%m/%d/%Y %H:%M:%S', '%d/%m/%Y %H:%M:%S', '%Y-%m-%d %H:%M:%S', '%d.%m.%Y %H:%M:%S',
+                '%m/%d/%Y %H:%M', '%d/%m/%Y %H:%M', '%Y-%m-%d %H:%M', '%d.%m.%Y %H:%M',
+                '%m/%d/%y %H:%M:%S', '%d/%m/%y %H:%M:%S', '%y-%m-%d %H:%M:%S', '%d.%m.%y %H:%M:%S',
+                '%m/%d/%y %H:%M', '%d/%m/%y %H:%M', '%y-%m-%d %H:%M', '%d.%m.%y %H:%M')
+# Header cells that mark the time and sample id columns
+TIME_HEADERS = ('acquisition date', 'date', 'time', 'date time', 'injection time')
+ID_HEADERS = ('sample id', 'sample', 'id', 'injection', 'injection number')
+# Maximum number of data rows whose timestamps are used to sniff the time format
+TIME_SAMPLE_ROWS = 100
+
+
+def sniff_file(file_handle, size=SNIFF_SIZE, max_size=MAX_SNIFF_SIZE):
+    """
+    Sniff the layout from the start of a file.
+
+    Only as much of the file as is needed to find the header rows and the first data row is
+    read, starting with `size` characters and doubling until `max_size`. The time format is
+    sniffed from the data rows within the characters that are read.
+
+    :param file_handle: a file handle opened in text mode.
+    :return: a dictionary with the `separator`, `data_start_line` and `data_layout` parameters.
+    """
+    head = file_handle.read(size)
+    while True:
+        complete = len(head) < size
+        try:
+            layout = sniff_layout(head, complete=complete)
+            break
+        except ValueError:
+            if complete or size >= max_size:
+                raise
+        more = file_handle.read(size)
+        head = head + more
+        size = size * 2
+
+    return layout
+
+
+def sniff_layout(head, complete=False):
+    """
+    Derive the parameters needed to parse a GC file from its first lines.
+
+    :param head: the start of the file as a string.
+    :param complete: True if `head` is the whole file, such that its last line is complete.
+    :return: a dictionary with the `separator`, `data_start_line` and `data_layout` parameters.
+    :raises ValueError: if the header rows or the first data row are not found.
+    """
+    lines = head.split('\n')
+    if not complete:
+        # The last line might have been cut
+        lines.pop()
+    lines = [line.rstrip('\r') for line in lines]
+
+    separator = sniff_separator(lines)
+    rows = [line.split(separator) for line in lines]
+    for index, cells in enumerate(rows):
+        if any(_normalize(cell) in TIME_HEADERS for cell in cells):
+            description_line = index
+            break
+    else:
+        raise ValueError('Could not find a header row naming the time column in the start of the file.')
+    data_start_line = description_line + 1
+    while data_start_line < len(rows) and not lines[data_start_line].strip():
+        data_start_line = data_start_line + 1
+    if data_start_line >= len(rows):
+        raise ValueError('Could not find a data row after the header in the start of the file.')
+
+    descriptions = rows[description_line]
+    names = rows[description_line - 1] if description_line > 0 else []
+    names = names + [''] * (len(descriptions) - len(names))
+    # The complete data rows in the head, to sniff the time format from
+    sample = [cells for line, cells in zip(lines[data_start_line:], rows[data_start_line:])
+              if line.strip()][:TIME_SAMPLE_ROWS]
+    time_format = None
+
+    data_layout = []
+    for column, (name, description) in enumerate(zip(names, descriptions)):
+        key = _normalize(description)
+        if key in TIME_HEADERS:
+            # Every channel starts with the time of the injection
+            if time_format is None:
+                time_format = sniff_time_format([cells[column] for cells in sample if column < len(cells)])
+            data_layout.append([{'time': time_format}])
+            continue
+        if not data_layout:
+            raise ValueError('Found a column before the time column in the header.')
+        if key in ID_HEADERS:
+            data_layout[-1].append({'id': 'int'})
+        elif not key:
+            data_layout[-1].append({'ignore': 'float'})
+        else:
+            data_layout[-1].append({_label(name, description): 'float'})
+    # Use the format of the first channel for the timestamps of all channels
+    for channel in data_layout:
+        channel[0]['time'] = time_format
+
+    return {'separator': separator, 'data_start_line': data_start_line, 'data_layout': data_layout}
+
+
+def sniff_separator(lines):
+    """
+    Return the separator that splits the last two non-empty lines into the same number of columns.
+
+    Only the last lines are compared, which are the second header row and data rows, as
+    comments and the names of the channels in the first header row often contain commas
+    and spaces.
+    """
+    lines = [line for line in lines if line.strip()]
+    if len(lines) < 2:
+        raise ValueError('Found less than two lines in the start of the file.')
+    for candidate in SEPARATORS:
+        count = lines[-1].count(candidate)
+        if count and lines[-2].count(candidate) == count:
+            return candidate
+    raise ValueError('Could not determine the separator from the start of the file.')
+
+
+def sniff_time_format(timestamps):
+    """
+    Return the first of the candidate time formats that all timestamps, without their timezone, match.
+
+    :param timestamps: a timestamp or a list of timestamps, e.g. of the first data rows.
+    :return: the time format.
+    :raises ValueError: if there are no timestamps or no candidate matches all of them.
+    """
+    if isinstance(timestamps, str):
+        timestamps = [timestamps]
+    timestamps = [timestamp.partition('(')[0].strip() for timestamp in timestamps]
+    timestamps = [timestamp for timestamp in timestamps if timestamp]
+    if not timestamps:
+        raise ValueError('Could not find any timestamps in the data rows to sniff the time format from.')
+    for time_format in TIME_FORMATS:
+        try:
+            for timestamp in timestamps:
+                datetime.strptime(timestamp, time_format)
+        except ValueError:
+            continue
+        return time_format
+    raise ValueError('The timestamps, e.g. {}, do not match any of the known time formats {}, please give the '
+                     'data_layout in the parameters.'.format(timestamps[0], ', '.join(TIME_FORMATS)))
+
+
+def _label(name, description):
+    """Compose the label of a data column from the species and the last word of the quantity, e.g. `Helium area`."""
+    quantity = description.split()[-1].lower()
+    name = name.strip()
+    if not name or name.lower().startswith('channel'):
+        return quantity
+    return '{} {}'.format(name, quantity)
+
+
+def _normalize(cell):
+    """Normalize a header cell for comparison."""
+    return ' '.join(cell.split()).lower()
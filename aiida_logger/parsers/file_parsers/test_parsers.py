@@ -6,10 +6,11 @@ from __future__ import print_function
 from __future__ import absolute_import
 
 import numpy as np
+import pytest
 
 from aiida.plugins import CalculationFactory, DataFactory
 
-from aiida_logger.utils.fixtures.data import fixture_retrieved  # noqa: F401
+from aiida_logger.utils.fixtures.data import fixture_retrieved, fixture_synthetic_gc, GC_EXAMPLE_LAYOUT  # noqa: F401
 
 
 def test_generic_gc_parsing(fixture_retrieved):  # noqa: F811
@@ -26,52 +27,7 @@ def test_generic_gc_parsing(fixture_retrieved):  # noqa: F811
         0,
         'data_start_line':
         2,
-        'data_layout': [[{
-            'time': '%m/%d/%y %H:%M:%S'
-        }, {
-            'id': 'int'
-        }, {
-            'He concentration': 'float'
-        }, {
-            'H2 concentration': 'float'
-        }, {
-            'O2 concentration': 'float'
-        }, {
-            'N2 concentration': 'float'
-        }, {
-            'CH4 concentration': 'float'
-        }, {
-            'CO concentration': 'float'
-        }, {
-            'ignore': 'float'
-        }, {
-            'He area': 'float'
-        }, {
-            'H2 area': 'float'
-        }, {
-            'O2 area': 'float'
-        }, {
-            'N2 area': 'float'
-        }, {
-            'CH4 area': 'float'
-        }, {
-            'CO area': 'float'
-        }],
-                        [{
-                            'time': '%m/%d/%y %H:%M:%S'
-                        }, {
-                            'id': 'int'
-                        }, {
-                            'CO2 concentration': 'float'
-                        }, {
-                            'H2O concentration': 'float'
-                        }, {
-                            'ignore': 'float'
-                        }, {
-                            'CO2 area': 'float'
-                        }, {
-                            'H2O area': 'float'
-                        }]],
+        'data_layout': GC_EXAMPLE_LAYOUT,
         'separator':
         '\t',
     })
@@ -117,3 +73,436 @@ def test_generic_gc_parsing(fixture_retrieved):  # noqa: F811
                            [2.064600e+00, 5.518600e+00, 1.390600e+04, 6.180700e+04],
                            [6.746800e+00, 3.891000e+00, 3.151360e+05, 5.453800e+04]])
     np.testing.assert_allclose(data.get_array('channel_2'), test_array)
+
+
+def gc_parameters(**kwargs):
+    """Return the parameters for the GC example file, updated with kwargs."""
+    parameters = {
+        'type': 'gc',
+        'comment_line': 0,
+        'data_start_line': 2,
+        'data_layout': GC_EXAMPLE_LAYOUT,
+        'separator': '\t',
+    }
+    parameters.update(kwargs)
+    return DataFactory('dict')(dict=parameters)
+
+
+def test_timestamp_formats():
+    """Test that timestamps are decoded with formats that have spaces in the date or the time of day."""
+    from aiida_logger.parsers.file_parsers.timestamps import TimestampDecoder, from_isoformat, to_isoformat
+
+    cases = [
+        ('%d %b %Y %H:%M:%S', ['17 Sep 2019 12:01:08', '18 Sep 2019 12:01:09 (GMT +01:00)']),
+        ('%m/%d/%Y %I:%M:%S %p', ['09/17/2019 12:01:08 PM', '09/18/2019 12:01:09 PM (GMT +01:00)']),
+        ('%m/%d/%y %H:%M:%S', ['09/17/19 12:01:08', '09/18/19 12:01:09 (GMT +01:00)']),
+    ]
+    for time_format, column in cases:
+        np.testing.assert_array_equal(
+            TimestampDecoder(time_format).decode(column),
+            np.array(['2019-09-17T12:01:08', '2019-09-18T11:01:09'], dtype='datetime64[ns]'))
+
+
+    # The start time keeps its fraction of a second, whole seconds are written without one
+    for text in ['2019-09-17T11:01:08Z', '2019-09-17T11:01:08.250000000Z', '2019-09-17T11:01:08.000000001Z']:
+        assert to_isoformat(from_isoformat(text)) == text
+
+
+def test_gc_engines_agree(fixture_retrieved):  # noqa: F811
+    """Test that the vectorized and reference engines give the same result."""
+    from aiida_logger.parsers.file_parsers.gc import GCParser
+
+    exit_codes = CalculationFactory('arithmetic.add').exit_codes
+
+    reference = GCParser(fixture_retrieved, 'gc_example.txt', exit_codes, gc_parameters(engine='reference')).parse()
+    vectorized = GCParser(fixture_retrieved, 'gc_example.txt', exit_codes, gc_parameters(engine='vectorized')).parse()
+
+    # A small chunk size makes sure lines are split across chunks
+    streamed = GCParser(fixture_retrieved, 'gc_example.txt', exit_codes, gc_parameters(chunk_size=64)).parse()
+    # Without memory mapping the file is decoded and split line by line
+    lines = GCParser(fixture_retrieved, 'gc_example.txt', exit_codes, gc_parameters(memory_map=False)).parse()
+
+    assert reference['metadata'].get_dict()['labels'] == vectorized['metadata'].get_dict()['labels']
+    for channel, statistics in vectorized['metadata'].get_dict()['statistics'].items():
+        for label, expected in reference['metadata'].get_dict()['statistics'][channel].items():
+            assert statistics[label] == pytest.approx(expected)
+    # The timestamps carry a (GMT +01:00) suffix, the start time is stored in UTC
+    assert vectorized['metadata'].get_dict()['start_time'] == '2019-09-17T11:01:08Z'
+    for name in ['channel_1', 'channel_2', 'time', 'id', 'injection_index']:
+        np.testing.assert_allclose(vectorized['data'].get_array(name), reference['data'].get_array(name))
+        np.testing.assert_allclose(streamed['data'].get_array(name), reference['data'].get_array(name))
+        np.testing.assert_allclose(lines['data'].get_array(name), reference['data'].get_array(name))
+
+
+def test_gc_parse_cache(fixture_retrieved, tmpdir):  # noqa: F811
+    """Test that a parsed result is stored in and fetched from the cache."""
+    from aiida_logger.parsers.file_parsers.gc import GCParser
+
+    exit_codes = CalculationFactory('arithmetic.add').exit_codes
+    parameters = gc_parameters(cache={'directory': str(tmpdir)})
+
+    parsed = GCParser(fixture_retrieved, 'gc_example.txt', exit_codes, parameters).parse()
+    assert len(tmpdir.listdir()) == 1
+    cached = GCParser(fixture_retrieved, 'gc_example.txt', exit_codes, parameters).parse()
+
+    assert cached['metadata'].get_dict() == parsed['metadata'].get_dict()
+    assert sorted(cached['data'].get_arraynames()) == sorted(parsed['data'].get_arraynames())
+    np.testing.assert_allclose(cached['data'].get_array('channel_1'), parsed['data'].get_array('channel_1'))
+
+    # Options that do not change the result hit the cache, a different engine misses it
+    GCParser(fixture_retrieved, 'gc_example.txt', exit_codes, gc_parameters(cache={'directory': str(tmpdir)},
+                                                                            workers=2)).parse()
+    assert len(tmpdir.listdir()) == 1
+    GCParser(fixture_retrieved, 'gc_example.txt', exit_codes, gc_parameters(cache={'directory': str(tmpdir)},
+                                                                            engine='reference')).parse()
+    assert len(tmpdir.listdir()) == 2
+
+
+def test_parse_datafiles(fixture_retrieved):  # noqa: F811
+    """Test concurrent parsing of several datafiles."""
+    from aiida_logger.parsers.logger import parse_datafiles
+
+    exit_codes = CalculationFactory('logger').exit_codes
+    datafiles = {'first': 'gc_example.txt', 'second': 'gc_example.txt'}
+
+    results = parse_datafiles(fixture_retrieved, datafiles, exit_codes, gc_parameters(workers=2))
+
+    assert sorted(results.keys()) == ['first', 'second']
+    for result in results.values():
+        assert result['data'].get_array('channel_2').shape == (7, 4)
+
+
+def test_parse_malformed_datafile(fixture_synthetic_gc):  # noqa: F811
+    """Test that a malformed memory mapped datafile gives an exit code without stopping the other datafiles."""
+    from aiida_logger.parsers.logger import parse_datafiles
+
+    synthetic = fixture_synthetic_gc(30, filename='good.txt')
+    lines = synthetic.directory.join('good.txt').read().splitlines(True)
+    # Cut a line in the middle of the first channel
+    lines[10] = '\t'.join(lines[10].split('\t')[:5]) + '\n'
+    synthetic.directory.join('bad.txt').write(''.join(lines))
+    exit_codes = CalculationFactory('logger').exit_codes
+
+    results = parse_datafiles(synthetic.retrieved(), {'good': 'good.txt', 'bad': 'bad.txt'}, exit_codes,
+                              DataFactory('dict')(dict=dict(synthetic.parameters, workers=2)))
+
+    assert results['bad'] == exit_codes.ERROR_INVALID_CONTENT_IN_OUTPUT_FILE
+    assert results['good']['data'].get_array('time').shape == (30, )
+
+
+def test_parse_datafiles_isolated(fixture_synthetic_gc, monkeypatch):  # noqa: F811
+    """Test that any error in one of the concurrently parsed datafiles gives an exit code for that file only."""
+    from aiida_logger.parsers.file_parsers.gc import GCParser
+    from aiida_logger.parsers.logger import parse_datafiles
+
+    synthetic = fixture_synthetic_gc(30, filename='good.txt')
+    for name in ['parameters.txt', 'unexpected.txt']:
+        synthetic.directory.join(name).write(synthetic.directory.join('good.txt').read())
+    errors = {'parameters.txt': KeyError('data_layout'), 'unexpected.txt': RuntimeError('unexpected')}
+    parse = GCParser._parse  # pylint: disable=protected-access
+
+    def failing_parse(self, file_handle):
+        if self.filename in errors:
+            raise errors[self.filename]
+        return parse(self, file_handle)
+
+    monkeypatch.setattr(GCParser, '_parse', failing_parse)
+    exit_codes = CalculationFactory('logger').exit_codes
+    datafiles = {'good': 'good.txt', 'parameters': 'parameters.txt', 'unexpected': 'unexpected.txt'}
+
+    results = parse_datafiles(synthetic.retrieved(), datafiles, exit_codes,
+                              DataFactory('dict')(dict=dict(synthetic.parameters, workers=3)))
+
+    assert results['parameters'] == exit_codes.ERROR_INVALID_PARAMETERS
+    assert results['unexpected'] == exit_codes.ERROR_UNEXPECTED_PARSING_FAILURE
+    assert results['good']['data'].get_array('time').shape == (30, )
+
+
+def test_gc_shifted_fields(fixture_synthetic_gc):  # noqa: F811
+    """Test that a field with a space and an empty field in another row are rejected by all engines."""
+    synthetic = fixture_synthetic_gc(30)
+    lines = synthetic.directory.join('synthetic.txt').read().splitlines(True)
+    for line, column, value in [(5, 3, '1 5'), (8, 4, '')]:
+        fields = lines[line].split('\t')
+        fields[column] = value
+        lines[line] = '\t'.join(fields)
+    synthetic.directory.join('synthetic.txt').write(''.join(lines))
+
+    for extra in [{}, {'chunk_size': 64}, {'engine': 'reference'}, {'memory_map': False}]:
+        with pytest.raises(ValueError, match='empty string'):
+            synthetic.parse(**extra)
+
+
+def test_synthetic_gc_parsing(fixture_synthetic_gc):  # noqa: F811
+    """Test parsing a synthetic gc datafile with three channels."""
+    result = fixture_synthetic_gc(100, channels=3, species=5, block_size=30).parse()
+    data = result['data']
+
+    for channel in ['channel_1', 'channel_2', 'channel_3']:
+        assert data.get_array(channel).shape == (100, 10)
+    np.testing.assert_allclose(data.get_array('time'), np.arange(100) * 200.0)
+    assert result['metadata'].get_dict()['labels'][2][0] == 'Helium concentration'
+
+
+def test_gc_parse_profile(fixture_retrieved):  # noqa: F811
+    """Test that the stages of the parsing are recorded in the metadata when profiling is enabled."""
+    from aiida_logger.parsers.file_parsers.gc import GCParser
+
+    exit_codes = CalculationFactory('arithmetic.add').exit_codes
+
+    result = GCParser(fixture_retrieved, 'gc_example.txt', exit_codes, gc_parameters()).parse()
+    assert 'profile' not in result['metadata'].get_dict()
+
+    result = GCParser(fixture_retrieved, 'gc_example.txt', exit_codes, gc_parameters(profile=True)).parse()
+    stages = result['metadata'].get_dict()['profile']['stages']
+    for stage in ['open', 'read', 'tokenize', 'timestamps', 'convert', 'set_array']:
+        assert stage in stages
+    assert stages['convert']['rows'] == 7
+
+
+def test_gc_sniffed_layout(fixture_retrieved):  # noqa: F811
+    """Test that parsing with a layout sniffed from the header gives the same result as the given layout."""
+    from aiida_logger.parsers.file_parsers.gc import GCParser
+
+    exit_codes = CalculationFactory('arithmetic.add').exit_codes
+    parameters = DataFactory('dict')(dict={'type': 'gc', 'data_layout': 'auto'})
+
+    given = GCParser(fixture_retrieved, 'gc_example.txt', exit_codes, gc_parameters()).parse()
+    sniffed = GCParser(fixture_retrieved, 'gc_example.txt', exit_codes, parameters).parse()
+
+    metadata = sniffed['metadata'].get_dict()
+    assert metadata['labels'][1] == ['CO2 concentration', 'H2O concentration', 'CO2 area', 'H2O area']
+    assert metadata['data_layout'][0][0] == {'time': '%m/%d/%Y %H:%M:%S'}
+    for name in ['channel_1', 'channel_2', 'time']:
+        np.testing.assert_allclose(sniffed['data'].get_array(name), given['data'].get_array(name))
+
+
+def test_sniff_time_format(fixture_synthetic_gc):  # noqa: F811
+    """Test that the time format is sniffed from a sample of rows, where the first rows are ambiguous."""
+    from aiida_logger.parsers.file_parsers.sniffer import sniff_layout, sniff_time_format
+
+    header = 'Channel 1\t\tHelium\nAcquisition Date\tSample ID\tArea\n'
+    rows = ['01/02/2019 10:00:00\t1\t1.0\n', '05/02/2019 10:30:00\t2\t2.0\n', '13/02/2019 11:00:00\t3\t3.0\n']
+
+    assert sniff_layout(header + rows[0], complete=True)['data_layout'][0][0] == {'time': '%m/%d/%Y %H:%M:%S'}
+    layout = sniff_layout(header + ''.join(rows), complete=True)['data_layout']
+    assert layout == [[{'time': '%d/%m/%Y %H:%M:%S'}, {'id': 'int'}, {'Helium area': 'float'}]]
+
+    # Two digit years are recognized, and timestamps that match no format are rejected
+    assert sniff_time_format(['09/17/19 12:01:08 (GMT +01:00)', '09/18/19 12:01:08']) == '%m/%d/%y %H:%M:%S'
+    with pytest.raises(ValueError, match='known time formats'):
+        sniff_time_format(['17 September 2019 12:01'])
+    # The offset of the timestamps with a two digit year is applied to the start time
+    metadata = fixture_synthetic_gc(20, time_format='%m/%d/%y %H:%M:%S').parse(data_layout='auto')['metadata']
+    assert metadata.get_dict()['data_layout'][0][0] == {'time': '%m/%d/%y %H:%M:%S'}
+    assert metadata.get_dict()['start_time'] == '2019-09-17T11:00:00Z'
+
+
+def test_gc_compressed(fixture_retrieved, tmpdir):  # noqa: F811
+    """Test that gzip, bzip2 and xz compressed datafiles are decompressed while parsing."""
+    import bz2
+    import gzip
+    import lzma
+    from aiida_logger.parsers.file_parsers.gc import GCParser
+
+    with fixture_retrieved.open('gc_example.txt', 'rb') as handle:
+        content = handle.read()
+    for extension, module in [('gz', gzip), ('bz2', bz2), ('xz', lzma)]:
+        tmpdir.join('gc_example.txt.' + extension).write_binary(module.compress(content))
+    retrieved = DataFactory('folder')()
+    retrieved.put_object_from_tree(path=str(tmpdir))
+
+    exit_codes = CalculationFactory('arithmetic.add').exit_codes
+    plain = GCParser(fixture_retrieved, 'gc_example.txt', exit_codes, gc_parameters()).parse()
+    for extension in ['gz', 'bz2', 'xz']:
+        compressed = GCParser(retrieved, 'gc_example.txt.' + extension, exit_codes, gc_parameters()).parse()
+        for name in ['channel_1', 'channel_2', 'time']:
+            np.testing.assert_allclose(compressed['data'].get_array(name), plain['data'].get_array(name))
+
+
+def test_gc_projection(fixture_retrieved):  # noqa: F811
+    """Test that only the channels and labels named in the projection are parsed."""
+    from aiida_logger.parsers.file_parsers.gc import GCParser
+
+    exit_codes = CalculationFactory('arithmetic.add').exit_codes
+    projection = {'channel_2': ['CO2 area', 'H2O concentration']}
+
+    full = GCParser(fixture_retrieved, 'gc_example.txt', exit_codes, gc_parameters()).parse()
+    for engine in ['vectorized', 'reference']:
+        projected = GCParser(fixture_retrieved, 'gc_example.txt', exit_codes,
+                             gc_parameters(engine=engine, projection=projection)).parse()
+        assert sorted(projected['data'].get_arraynames()) == ['channel_2', 'id', 'injection_index', 'time']
+        assert projected['metadata'].get_dict()['labels'] == [['H2O concentration', 'CO2 area']]
+        np.testing.assert_allclose(projected['data'].get_array('channel_2'),
+                                   full['data'].get_array('channel_2')[:, [1, 2]])
+        np.testing.assert_allclose(projected['data'].get_array('time'), full['data'].get_array('time'))
+
+
+def test_gc_row_selection(fixture_synthetic_gc):  # noqa: F811
+    """Test that a row range and time window select the same rows with and without the index of a previous parse."""
+    synthetic = fixture_synthetic_gc(1000, block_size=300)
+
+    full = synthetic.parse(index_interval=100)
+    index = full['metadata'].get_dict()['index']
+    assert index['rows'] == list(range(0, 1000, 100))
+    channel = full['data'].get_array('channel_1')
+    for extra in [{}, {'index': index}, {'index': index, 'chunk_size': 64}]:
+        selected = synthetic.parse(row_range=[250, 420], **extra)
+        np.testing.assert_allclose(selected['data'].get_array('channel_1'), channel[250:420])
+        np.testing.assert_allclose(selected['data'].get_array('time'), np.arange(170) * 200.0)
+        # The synthetic rows are 200 seconds apart
+        selected = synthetic.parse(time_window=[200.0 * 510, 200.0 * 530], **extra)
+        np.testing.assert_allclose(selected['data'].get_array('channel_1'), channel[510:530])
+
+
+def test_gc_incremental(fixture_synthetic_gc):  # noqa: F811
+    """Test that an incremental parse only parses the appended rows and falls back to a full parse on changes."""
+    from aiida_logger.utils.array import concatenate_series
+
+    synthetic = fixture_synthetic_gc(300)
+    datafile = synthetic.directory.join(synthetic.filename)
+    lines = datafile.read().splitlines(True)
+
+    def parse(content, **kwargs):
+        datafile.write(content)
+        return synthetic.parse(**kwargs)
+
+    full = parse(''.join(lines))
+    first = parse(''.join(lines[:102]), incremental=True)
+    delta = parse(''.join(lines), incremental=True, previous=first['metadata'].get_dict()['tail'])
+    assert delta['metadata'].get_dict()['first_row'] == 100
+    assert delta['data'].get_array('channel_1').shape == (200, 8)
+    series = concatenate_series([first['data'], delta['data']])
+    for name in ['channel_1', 'channel_2', 'time']:
+        np.testing.assert_allclose(series[name], full['data'].get_array(name))
+
+    # A change before the end of the previous parse gives a full parse
+    changed = parse(''.join(lines).replace('Helium', 'Argon', 1), incremental=True,
+                    previous=first['metadata'].get_dict()['tail'])
+    assert changed['metadata'].get_dict()['first_row'] == 0
+    assert changed['data'].get_array('channel_1').shape == (300, 8)
+
+
+def test_gc_segmented(fixture_synthetic_gc):  # noqa: F811
+    """Test that segmented arrays are read back through the view as the arrays of an unsegmented parse."""
+    from concurrent.futures import ThreadPoolExecutor
+    from aiida_logger.utils.segments import SegmentedArrayView, array_names, get_array
+
+    synthetic = fixture_synthetic_gc(1000)
+
+    full = synthetic.parse()['data']
+    segmented = synthetic.parse(segment_rows=300)['data']
+    assert 'channel_1_segment_000003' in segmented.get_arraynames()
+    assert sorted(array_names(segmented)) == sorted(full.get_arraynames())
+    for name in full.get_arraynames():
+        np.testing.assert_allclose(get_array(segmented, name), full.get_array(name))
+    view = SegmentedArrayView(segmented, 'channel_1')
+    channel = full.get_array('channel_1')
+    assert view.shape == channel.shape
+    np.testing.assert_allclose(view[250:650:7, 1], channel[250:650:7, 1])
+    np.testing.assert_allclose(view[::-3], channel[::-3])
+    np.testing.assert_allclose(view[-1], channel[-1])
+    # The synthetic rows are 200 seconds apart
+    assert view.time_slice(200.0 * 510, 200.0 * 530) == slice(510, 530)
+
+    # Threads reading different segments of the same view get their own rows
+    view = SegmentedArrayView(segmented, 'channel_1')
+    starts = list(range(0, 1000, 50)) * 10
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for start, rows in zip(starts, executor.map(lambda start: view[start:start + 50], starts)):
+            np.testing.assert_allclose(rows, channel[start:start + 50])
+
+
+def test_gc_dtypes(fixture_synthetic_gc):  # noqa: F811
+    """Test that the dtypes in the data layout and the time_dtype are used for the arrays."""
+    from aiida_logger.parsers.file_parsers.gc import convert_sample_id, tokenize_buffer
+    from aiida_logger.parsers.file_parsers.layout import compile_layout
+
+    synthetic = fixture_synthetic_gc(500)
+
+    full = synthetic.parse()
+    compact_layout = [[{key: {'float': 'float32', 'int': 'int32'}[value] if key != 'time' else value
+                        for key, value in item.items()} for item in channel]
+                      for channel in synthetic.parameters['data_layout']]
+    for extra in [{}, {'memory_map': False}]:
+        compact = synthetic.parse(data_layout=compact_layout, time_dtype='int64', **extra)
+        for name in ['channel_1', 'channel_2']:
+            assert compact['data'].get_array(name).dtype == np.float32
+            np.testing.assert_allclose(compact['data'].get_array(name), full['data'].get_array(name), rtol=1e-6)
+        assert compact['data'].get_array('id').dtype == np.int32
+        time = compact['data'].get_array('time')
+        assert time.dtype == np.int64
+        start = np.datetime64(full['metadata'].get_dict()['start_time'].rstrip('Z'), 'ns').astype(np.int64)
+        np.testing.assert_allclose((time - start) / 1e9, full['data'].get_array('time'))
+
+    # The memory mapped blocks are converted to float32 directly, without a float64 copy
+    content = synthetic.directory.join('synthetic.txt').read_binary()
+    start = len(b''.join(content.splitlines(True)[:synthetic.parameters['data_start_line']]))
+    block = tokenize_buffer(content, start, len(content), b'\t', compile_layout(compact_layout))
+    assert [values.dtype for values in block[2]] == [np.float32, np.float32]
+    # Sample ids that do not fit in the dtype of the id are not truncated
+    with pytest.raises(ValueError):
+        convert_sample_id(np.array(['12', '3000000000']), np.int32)
+
+
+def test_gc_injections(fixture_synthetic_gc):  # noqa: F811
+    """Test that the rows of injections are looked up with the injection index, also in segmented arrays."""
+    from aiida_logger.utils.injections import injection_rows, select_injections
+
+    synthetic = fixture_synthetic_gc(400)
+
+    full = synthetic.parse()['data']
+    sample_id = full.get_array('id')
+    assert sample_id.shape == full.get_array('time').shape
+    np.testing.assert_array_equal(sample_id, synthetic.parse(engine='reference')['data'].get_array('id'))
+    samples = np.unique(sample_id)[[0, -1]]
+    expected = np.flatnonzero(np.isin(sample_id, samples))
+    index = full.get_array('injection_index')
+    np.testing.assert_array_equal(injection_rows(index, samples), expected)
+    for data in [full, synthetic.parse(segment_rows=64)['data']]:
+        selected = select_injections(data, samples, names=['channel_2', 'time'])
+        np.testing.assert_array_equal(selected['rows'], expected)
+        np.testing.assert_allclose(selected['channel_2'], full.get_array('channel_2')[expected])
+        np.testing.assert_allclose(selected['time'], full.get_array('time')[expected])
+
+
+def test_gc_query_attributes(fixture_synthetic_gc):  # noqa: F811
+    """Test that the time range and content of a parse are stored as attributes and can be queried."""
+    from aiida_logger.utils.query import find_data
+
+    synthetic = fixture_synthetic_gc(100)
+
+    full = synthetic.parse()['data']
+    # The synthetic rows start at 2019-09-17 12:00:00 in GMT +01:00 and are 200 seconds apart
+    assert full.get_attribute('start_time') == '2019-09-17T11:00:00Z'
+    assert full.get_attribute('end_epoch') - full.get_attribute('start_epoch') == 99 * 200.0
+    assert full.get_attribute('row_count') == 100
+    assert full.get_attribute('channels') == ['channel_1', 'channel_2']
+    assert 'Helium area' in full.get_attribute('labels')
+    compact = synthetic.parse(time_dtype='int64', projection={'channel_2': 'all'})['data']
+    assert compact.get_attribute('start_epoch') == full.get_attribute('start_epoch')
+    assert compact.get_attribute('end_epoch') == full.get_attribute('end_epoch')
+    assert compact.get_attribute('channels') == ['channel_2']
+
+    full.store()
+    compact.store()
+    start = full.get_attribute('start_epoch')
+    assert {node.uuid for node in find_data(start + 1000, start + 2000)} == {full.uuid, compact.uuid}
+    assert [node.uuid for node in find_data(start + 1000, channels=['channel_1'])] == [full.uuid]
+    assert not find_data(end=start - 1)
+
+
+def test_gc_structured(fixture_retrieved):  # noqa: F811
+    """Test that channels can be stored as structured arrays with the labels as fields."""
+    from aiida_logger.parsers.file_parsers.gc import GCParser
+
+    exit_codes = CalculationFactory('arithmetic.add').exit_codes
+    plain = GCParser(fixture_retrieved, 'gc_example.txt', exit_codes, gc_parameters()).parse()
+    for engine in ['vectorized', 'reference']:
+        structured = GCParser(fixture_retrieved, 'gc_example.txt', exit_codes,
+                              gc_parameters(structured=True, engine=engine)).parse()
+        for name, labels in zip(['channel_1', 'channel_2'], plain['metadata'].get_dict()['labels']):
+            channel = structured['data'].get_array(name)
+            assert list(channel.dtype.names) == labels
+            for column, label in enumerate(labels):
+                np.testing.assert_allclose(channel[label], plain['data'].get_array(name)[:, column])
@@ -0,0 +1,191 @@
+"""
+Decoding of timestamps.
+
+-----------------------
+Timestamps are decoded in batches using the format given in the data layout. The
+date part is typically shared by many consecutive rows and is only parsed once, the
+time of day is converted with NumPy and a trailing timezone suffix such as
+`(GMT +01:00)` is taken into account. Rows that do not match the format are parsed
+with the fuzzy parser of dateutil as a fallback.
+"""
+from __future__ import absolute_import
+
+import re
+from datetime import datetime
+
+import numpy as np
+
+# Matches a timezone suffix like (GMT +01:00), UTC-0500 or +01:00
+_TIMEZONE = re.compile(r'^\(?\s*(?:GMT|UTC)?\s*(?:([+-])(\d{1,2}):?(\d{2}))?\s*\)?$')
+# Time formats that can be converted with NumPy without calling strptime for each row
+_FAST_TIME_FORMATS = ('%H:%M:%S', '%H:%M')
+# Directives that start the time of day in a time format
+_CLOCK_DIRECTIVES = ('%H', '%I', '%M', '%S')
+# Maximum number of dates kept in the cache
+_MAX_CACHED_DATES = 4096
+_NANOSECONDS = 10**9
+
+
+class TimestampDecoder():
+    """
+    Decode columns of timestamp strings to datetime64[ns] arrays in UTC.
+
+    Timestamps without timezone information are assumed to be in UTC.
+    """
+    def __init__(self, time_format=None):
+        self.time_format = time_format
+        self.date_formats = []
+        self.clock_format = None
+        self._date_cache = {}
+        if time_format:
+            date_format, clock_format = _split_format(time_format)
+            self.date_formats = _alternative_formats(date_format)
+            self.clock_format = clock_format
+
+    def decode(self, column):
+        """
+        Decode a column of timestamps.
+
+        :param column: an iterable of timestamp strings.
+        :return: a datetime64[ns] array in UTC.
+        """
+        column = np.char.strip(np.asarray(column, dtype=str))
+        if self.clock_format is not None and column.size:
+            try:
+                return self._decode_batch(column)
+            except ValueError:
+                pass
+
+        return np.array([self._decode_one(item) for item in column], dtype='datetime64[ns]')
+
+    def _decode_batch(self, column):
+        """Decode the whole column with NumPy, raising ValueError if any of the rows do not match."""
+        body, _, suffix = np.char.partition(column, '(').T
+        # Split off as many words from the end as the time of day has in its format
+        dates = np.char.strip(body)
+        clock = None
+        for _ in range(self.clock_format.count(' ') + 1):
+            dates, _, word = np.char.rpartition(dates, ' ').T
+            clock = word if clock is None else np.char.add(np.char.add(word, ' '), clock)
+
+        # Parse each distinct date and timezone only once
+        unique_dates, date_inverse = np.unique(dates, return_inverse=True)
+        days = np.array([self._parse_date(item) for item in unique_dates], dtype=np.int64)
+        unique_suffixes, suffix_inverse = np.unique(suffix, return_inverse=True)
+        offsets = np.array([_parse_offset(item) for item in unique_suffixes], dtype=np.int64)
+        if self.clock_format in _FAST_TIME_FORMATS:
+            hours, _, rest = np.char.partition(clock, ':').T
+            minutes, _, seconds = np.char.partition(rest, ':').T
+            if self.clock_format == '%H:%M':
+                seconds = np.zeros(len(clock))
+            elif (seconds == '').any():
+                raise ValueError('Missing seconds in timestamp.')
+            nanoseconds = (hours.astype(np.int64) * 3600 + minutes.astype(np.int64) * 60) * _NANOSECONDS + np.rint(
+                np.asarray(seconds, dtype=np.float64) * _NANOSECONDS).astype(np.int64)
+        else:
+            nanoseconds = np.array([_clock_nanoseconds(datetime.strptime(item, self.clock_format)) for item in clock],
+                                   dtype=np.int64)
+
+        return (days[date_inverse.ravel()] + nanoseconds - offsets[suffix_inverse.ravel()]).view('datetime64[ns]')
+
+    def _parse_date(self, date):
+        """Parse a date and return nanoseconds since the epoch, caching the result."""
+        try:
+            return self._date_cache[date]
+        except KeyError:
+            pass
+        for date_format in self.date_formats:
+            try:
+                value = np.datetime64(datetime.strptime(date, date_format).date(), 'ns').astype(np.int64)
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError('The date {} does not match the format {}.'.format(date, self.time_format))
+        if len(self._date_cache) >= _MAX_CACHED_DATES:
+            self._date_cache.clear()
+        self._date_cache[date] = value
+
+        return value
+
+    def _decode_one(self, item):
+        """Decode one timestamp, using the fuzzy parser of dateutil if it does not match the format."""
+        if self.time_format:
+            body, _, suffix = item.partition('(')
+            for time_format in _alternative_formats(self.time_format):
+                try:
+                    date_time = datetime.strptime(body.strip(), time_format)
+                    return np.datetime64(date_time, 'ns') - np.timedelta64(_parse_offset(suffix), 'ns')
+                except ValueError:
+                    continue
+        from dateutil import parser
+        date_time = parser.parse(item, fuzzy=True)
+        if date_time.utcoffset() is not None:
+            date_time = date_time.replace(tzinfo=None) - date_time.utcoffset()
+
+        return np.datetime64(date_time, 'ns')
+
+
+def _split_format(time_format):
+    """
+    Split a time format into its date and time of day, which may both contain spaces.
+
+    :return: the date format and the format of the time of day, or the time format and None if
+        it does not end with a time of day following the date.
+    """
+    words = time_format.split(' ')
+    for index, word in enumerate(words):
+        if any(directive in word for directive in _CLOCK_DIRECTIVES):
+            if index == 0:
+                break
+            return ' '.join(words[:index]), ' '.join(words[index:])
+    return time_format, None
+
+
+def _alternative_formats(date_format):
+    """Return the format, followed by the same format with two and four digit years swapped."""
+    formats = [date_format]
+    if '%y' in date_format:
+        formats.append(date_format.replace('%y', '%Y'))
+    elif '%Y' in date_format:
+        formats.append(date_format.replace('%Y', '%y'))
+    return formats
+
+
+def _parse_offset(suffix):
+    """Return the UTC offset in nanoseconds of a timezone suffix."""
+    match = _TIMEZONE.match(suffix.strip())
+    if match is None:
+        raise ValueError('Unknown timezone {}.'.format(suffix))
+    sign, hours, minutes = match.groups()
+    if sign is None:
+        return 0
+    offset = (int(hours) * 3600 + int(minutes) * 60) * _NANOSECONDS
+    return -offset if sign == '-' else offset
+
+
+def _clock_nanoseconds(clock):
+    """Return the time of day of a datetime in nanoseconds."""
+    return ((clock.hour * 60 + clock.minute) * 60 + clock.second) * _NANOSECONDS + clock.microsecond * 1000
+
+
+def to_seconds(date_time, reference_time):
+    """Return the time in seconds relative to the reference time as floats."""
+    return (date_time - reference_time) / np.timedelta64(1, 's')
+
+
+def to_isoformat(date_time):
+    """
+    Return a datetime64 in UTC as an ISO 8601 string.
+
+    Whole seconds are written without a fraction, other times with all nine digits of the nanoseconds,
+    such that the absolute times rebuilt from the string are exact.
+    """
+    date_time = np.datetime64(date_time, 'ns')
+    whole = date_time.astype(np.int64) % _NANOSECONDS == 0
+    return str(np.datetime_as_string(date_time, unit='s' if whole else 'ns', timezone='UTC'))
+
+
+def from_isoformat(text):
+    """Return an ISO 8601 string in UTC, as written by :func:`to_isoformat`, as a datetime64[ns]."""
+    return np.datetime64(text.rstrip('Z'), 'ns')
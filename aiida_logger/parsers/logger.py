@@ -6,12 +6,16 @@ Register parsers via the "aiida.parsers" entry point in setup.json.
 """
 from __future__ import absolute_import
 
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
 from aiida.common import exceptions
 from aiida.engine import ExitCode
 from aiida.parsers.parser import Parser
 from aiida.plugins import CalculationFactory
 
-from aiida_logger.parsers.file_parsers.gc import GCParser
+from aiida_logger.utils.profiling import format_profile
 
 class LoggerParser(Parser):
     """
@@ -34,10 +38,13 @@ class LoggerParser(Parser):
         """
         Parse outputs, store results in database.
 
+        A single datafile is stored in the `data` and `metadata` outputs. When more than one
+        datafile is given, they are parsed concurrently and stored in the `datafiles_data` and
+        `datafiles_metadata` namespaces under the same keys as in the `datafiles` input.
+
         :returns: an exit code, if parsing fails (or nothing if parsing succeeds)
         """
 
-        import fleep
         from aiida.common.links import LinkType
 
         # Check if retrieved folder is present
@@ -49,24 +56,113 @@ class LoggerParser(Parser):
         # Check that folder content is as expected
         files_retrieved = output_folder.list_object_names()
         inputs = self.node.get_incoming(link_type=LinkType.INPUT_CALC).nested()
-        files_expected = inputs['datafiles']
-        files_expected = [item.filename for item in files_expected.values()]
+        datafiles = {key: item.filename for key, item in inputs['datafiles'].items()}
+        files_expected = list(datafiles.values())
         # Note: set(A) <= set(B) checks whether A is a subset of B
         if not set(files_expected) <= set(files_retrieved):
             self.logger.error("Found files '{}', expected to find '{}'".format(
                 files_retrieved, files_expected))
             return self.exit_codes.ERROR_MISSING_OUTPUT_FILES
-        if len(files_expected) > 1:
-            raise NotImplementedError('Only one file is currently supported for parsing.')
-        filename=files_expected[0]
         parameters = inputs['parameters']
-        gc_parser = GCParser(output_folder, filename, self.exit_codes, parameters)
-        result = gc_parser.parse()
+        results = parse_datafiles(output_folder, datafiles, self.exit_codes, parameters, self.logger)
+
+        if len(results) == 1:
+            result = list(results.values())[0]
+            if isinstance(result, dict):
+                self.out('data', result['data'])
+                self.out('metadata', result['metadata'])
+            else:
+                # Assume we have an exit code
+                return result
+            return ExitCode(0)
+
+        exit_code = ExitCode(0)
+        for key, result in results.items():
+            if isinstance(result, dict):
+                self.out('datafiles_data.{}'.format(key), result['data'])
+                self.out('datafiles_metadata.{}'.format(key), result['metadata'])
+            else:
+                # Report the failed datafile, but keep the outputs of the others
+                self.logger.error("Parsing of the datafile '{}' failed: {}".format(datafiles[key], result.message))
+                exit_code = result
+
+        return exit_code
+
+
+def parse_datafiles(folder, datafiles, exit_codes, parameters, logger=None):
+    """
+    Parse several datafiles concurrently using a pool of worker threads.
+
+    The number of workers is set by the `workers` entry in the parameters and defaults to the
+    number of datafiles, limited by the number of processors. The files are parsed into plain
+    arrays in the workers, while the nodes are composed in the calling thread. A failure in one
+    datafile does not stop the others.
+
+    :param folder: the folder containing the datafiles.
+    :param datafiles: a dictionary of keys and the filenames to parse.
+    :param exit_codes: the exit codes of the calculation.
+    :param parameters: a Dict with the parameters of the parsing.
+    :param logger: an optional logger used to report failures.
+    :return: a dictionary with the same keys as `datafiles`, containing either the `data` and `metadata`
+        nodes or an exit code.
+    """
+    from aiida_logger.parsers.file_parsers.base import compose_result
+
+    try:
+        workers = parameters.get_dict()['workers']
+    except KeyError:
+        workers = min(len(datafiles), os.cpu_count() or 1)
+    try:
+        segment_rows = parameters.get_dict()['segment_rows']
+    except KeyError:
+        segment_rows = None
+
+    parse_datafile = partial(parse_arrays, folder, exit_codes=exit_codes, parameters=parameters, logger=logger)
+    keys = list(datafiles.keys())
+    if len(keys) == 1 or workers <= 1:
+        parsed = [parse_datafile(datafiles[key]) for key in keys]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            parsed = list(executor.map(parse_datafile, [datafiles[key] for key in keys]))
+
+    results = {}
+    for key, result in zip(keys, parsed):
         if isinstance(result, dict):
-            self.out('data', result['data'])
-            self.out('metadata', result['metadata'])
-        else:
-            # Assume we have an exit code
-            return result
+            result = compose_result(result['arrays'], result['metadata'], result['profiler'], segment_rows)
+            metadata = result['metadata'].get_dict()
+            if 'profile' in metadata and logger is not None:
+                logger.info("Profile of the parsing of '{}':\n{}".format(datafiles[key], format_profile(metadata['profile'])))
+        results[key] = result
+
+    return results
+
 
-        return ExitCode(0)
+def parse_arrays(folder, filename, exit_codes, parameters, logger=None):
+    """
+    Parse one datafile into plain arrays and metadata.
+
+    :return: a dictionary with the `arrays`, `metadata` and `profiler` or an exit code. All errors are
+        converted to an exit code, such that a failure in one datafile does not stop the others that
+        are parsed concurrently.
+    """
+    from aiida_logger.parsers.file_parsers.gc import GCParser
+
+    try:
+        gc_parser = GCParser(folder, filename, exit_codes, parameters)
+        result = gc_parser.parse_arrays()
+        if isinstance(result, dict):
+            result['profiler'] = gc_parser.profiler
+        return result
+    except (ValueError, IndexError) as exception:
+        if logger is not None:
+            logger.error("Could not parse the content of '{}': {}".format(filename, exception))
+        return exit_codes.ERROR_INVALID_CONTENT_IN_OUTPUT_FILE
+    except (KeyError, TypeError) as exception:
+        # E.g. a missing parameter or a data layout of the wrong structure
+        if logger is not None:
+            logger.error("Could not parse '{}' with the given parameters: {!r}".format(filename, exception))
+        return exit_codes.ERROR_INVALID_PARAMETERS
+    except Exception as exception:  # pylint: disable=broad-except
+        if logger is not None:
+            logger.exception("Unexpected failure while parsing '{}': {!r}".format(filename, exception))
+        return exit_codes.ERROR_UNEXPECTED_PARSING_FAILURE
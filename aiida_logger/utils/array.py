@@ -10,3 +10,89 @@ def string_to_float(list_of_strings, separator):
         array.append(np.fromstring(item, sep=separator))
 
     return np.asarray(array)
+
+
+class GrowableArray():
+    """
+    A preallocated NumPy buffer that rows can be appended to.
+
+    The capacity is doubled whenever the buffer is full, such that appending is amortized
+    constant time. Rows given as strings are converted directly into the buffer.
+    """
+    def __init__(self, shape=(), dtype=np.float64, capacity=1024):
+        self._buffer = np.empty((capacity, ) + tuple(shape), dtype=dtype)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def dtype(self):
+        """Return the dtype of the buffer."""
+        return self._buffer.dtype
+
+    def append(self, rows):
+        """Append a block of rows to the buffer, growing it if needed."""
+        required = self._size + len(rows)
+        if required > len(self._buffer):
+            buffer = np.empty((max(required, 2 * len(self._buffer)), ) + self._buffer.shape[1:], dtype=self._buffer.dtype)
+            buffer[:self._size] = self._buffer[:self._size]
+            self._buffer = buffer
+        self._buffer[self._size:required] = rows
+        self._size = required
+
+    def to_array(self):
+        """Return the appended rows as an array."""
+        return self._buffer[:self._size]
+
+
+def to_structured(array, labels):
+    """
+    View a two dimensional array as a structured array with one field per column, named by the labels.
+
+    The array is not copied if it is contiguous, as all columns share its dtype.
+    """
+    array = np.ascontiguousarray(array)
+    try:
+        dtype = np.dtype([(str(label), array.dtype) for label in labels])
+    except ValueError as e:
+        raise ValueError('The labels {} can not be used as the fields of a structured array.'.format(labels)) from e
+    return array.view(dtype).reshape(len(array))
+
+
+def to_columns(array):
+    """Return a structured array as a two dimensional array with one column per field, other arrays as they are."""
+    if array.dtype.names is None:
+        return array
+    from numpy.lib import recfunctions
+    return recfunctions.structured_to_unstructured(array)
+
+
+def concatenate_series(data_sets):
+    """
+    Concatenate the arrays of a full parse and the deltas of later incremental parses.
+
+    Arrays without rows, i.e. scalars, are taken from the last data set. The injection index is
+    built anew for the concatenated sample ids.
+
+    :param data_sets: a list of dictionaries of arrays, or ArrayData, which may be segmented, in the order
+        they were parsed.
+    :return: a dictionary with the concatenated arrays.
+    """
+    from aiida_logger.utils.injections import INJECTION_INDEX, build_injection_index
+    from aiida_logger.utils.segments import array_names, get_array
+
+    data_sets = [data if isinstance(data, dict) else {name: get_array(data, name) for name in array_names(data)}
+                 for data in data_sets]
+    arrays = {}
+    for name in data_sets[0]:
+        if name == INJECTION_INDEX:
+            continue
+        parts = [data[name] for data in data_sets]
+        if parts[0].ndim:
+            arrays[name] = np.concatenate(parts)
+        else:
+            arrays[name] = parts[-1]
+    if INJECTION_INDEX in data_sets[0] and 'id' in arrays:
+        arrays[INJECTION_INDEX] = build_injection_index(arrays['id'])
+    return arrays
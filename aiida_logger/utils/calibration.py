@@ -0,0 +1,172 @@
+"""
+Calibration of GC data.
+
+-----------------------
+The calibration given in the parameters contains, for each channel, a list of single key
+dictionaries with the species and its response. A number is a linear response, i.e. the
+concentration is the area times the number. A list is a polynomial response with the
+coefficients in increasing order, i.e. `[a0, a1, a2]` gives `a0 + a1 * area + a2 * area**2`.
+
+The calibration is compiled once into the area columns of each channel and one matrix
+of coefficients, which is then applied to all channels and any number of data sets in
+one vectorized evaluation.
+"""
+from __future__ import absolute_import
+
+import json
+from functools import lru_cache
+
+import numpy as np
+
+from aiida_logger.parsers.file_parsers.layout import compile_layout
+from aiida_logger.utils.array import to_structured
+from aiida_logger.utils.segments import get_array
+
+
+class CalibrationEngine():
+    """A compiled calibration for all channels."""
+    def __init__(self, channels, columns, coefficients, fields=None, species=None):  # pylint: disable=too-many-arguments
+        """
+        Initialize the calibration engine.
+
+        :param channels: the names of the calibrated channels.
+        :param columns: for each channel, the indices of the calibrated area columns in the channel array.
+        :param coefficients: a (degree + 1, number of species) array of polynomial coefficients in
+            increasing order, with the species of all channels following each other.
+        :param fields: for each channel, the labels of the calibrated area columns, which are the fields
+            selected when the channel is stored as a structured array.
+        :param species: for each channel, the calibrated species, which are the fields of the concentrations
+            when the channels are stored as structured arrays.
+        """
+        self.channels = channels
+        self.columns = columns
+        self.coefficients = coefficients
+        self.fields = fields
+        self.species = species
+        self._splits = np.cumsum([len(item) for item in columns])[:-1]
+
+    def apply(self, arrays):
+        """
+        Calculate the concentrations of one data set.
+
+        :param arrays: a dictionary, or an ArrayData, with the arrays of each channel.
+        :return: a dictionary with the concentrations of each channel.
+        """
+        return self.apply_many([arrays])[0]
+
+    def apply_many(self, data_sets):
+        """
+        Calculate the concentrations of several data sets in one evaluation.
+
+        :param data_sets: a list of dictionaries, or ArrayData, with the arrays of each channel.
+        :return: a list with a dictionary of the concentrations of each channel for each data set. The
+            concentrations are structured arrays with the species as fields if the channels are.
+        """
+        if not data_sets:
+            return []
+        # Place the calibrated areas of all channels next to each other and all data sets below each other
+        channel_arrays = [[_get_array(data, channel) for channel in self.channels] for data in data_sets]
+        areas = np.vstack([
+            np.hstack([self._areas(array, index) for index, array in enumerate(arrays)]) for arrays in channel_arrays
+        ])
+        concentrations = evaluate_polynomial(self.coefficients, areas)
+
+        rows = np.cumsum([len(arrays[0]) for arrays in channel_arrays])[:-1]
+        structured = channel_arrays[0][0].dtype.names is not None
+        results = []
+        for concentration in np.split(concentrations, rows):
+            channel_concentrations = np.split(concentration, self._splits, axis=1)
+            if structured:
+                channel_concentrations = [
+                    to_structured(item, species) for item, species in zip(channel_concentrations, self.species)
+                ]
+            results.append(dict(zip(self.channels, channel_concentrations)))
+        return results
+
+    def _areas(self, array, index):
+        """Select the calibrated area columns of a channel, by their fields if the channel is a structured array."""
+        if array.dtype.names is None:
+            return array[:, self.columns[index]]
+        return np.stack([array[field] for field in self.fields[index]], axis=1)
+
+
+def evaluate_polynomial(coefficients, values):
+    """Evaluate the polynomials with coefficients in increasing order column wise using Horner's method."""
+    if len(coefficients) == 2 and not coefficients[0].any():
+        # Linear response without offset
+        return values * coefficients[1]
+    result = np.broadcast_to(coefficients[-1], values.shape).astype(np.float64)
+    for coefficient in coefficients[-2::-1]:
+        result = result * values + coefficient
+    return result
+
+
+def compile_calibration(calibration, data_layout, projection=None):
+    """
+    Compile the calibration into a CalibrationEngine.
+
+    The species of the calibration are matched to the `<species> area` labels in the data layout.
+    If they are not found, the calibration is applied in order to the columns that follow the
+    concentration columns of each channel.
+
+    :param calibration: a list with one entry per channel, each a list of single key dictionaries
+        with the species and its response.
+    :param data_layout: the data layout given in the parameters.
+    :param projection: the projection given in the parameters, if any. The calibration still has
+        one entry per channel in the data layout, but the channels that are not kept are skipped
+        and the species must be matched to kept labels.
+    """
+    return _compile_calibration(json.dumps(calibration, sort_keys=True), json.dumps(data_layout, sort_keys=True),
+                                json.dumps(projection, sort_keys=True))
+
+
+@lru_cache(maxsize=32)
+def _compile_calibration(calibration, data_layout, projection):
+    """Compile the calibration given as canonical JSON, such that equal calibrations are compiled once."""
+    calibration = json.loads(calibration)
+    plan = compile_layout(json.loads(data_layout))
+    projection = json.loads(projection)
+    if projection is not None:
+        projected = compile_layout(json.loads(data_layout), projection)
+        kept = {channel.name: channel for channel in projected.channels}
+    channels = []
+    columns = []
+    fields = []
+    species_names = []
+    responses = []
+    for channel, channel_calibration in zip(plan.channels, calibration):
+        species = [list(item.keys())[0] for item in channel_calibration]
+        labels = ['{} area'.format(item) for item in species]
+        if projection is not None:
+            if channel.name not in kept:
+                continue
+            channel = kept[channel.name]
+            if not all(label in channel.labels for label in labels):
+                raise ValueError('The calibration of {} needs the labels {}, which are not all kept by the '
+                                 'projection.'.format(channel.name, labels))
+        if all(label in channel.labels for label in labels):
+            indices = [channel.labels.index(label) for label in labels]
+        else:
+            start = len([label for label in channel.labels if 'concentration' in label])
+            indices = list(range(start, start + len(species)))
+        channels.append(channel.name)
+        columns.append(indices)
+        fields.append([channel.labels[index] for index in indices])
+        species_names.append(species)
+        for item in channel_calibration:
+            response = list(item.values())[0]
+            responses.append([0.0, response] if np.isscalar(response) else list(response))
+
+    degree = max(len(response) for response in responses)
+    coefficients = np.zeros((degree, len(responses)))
+    for index, response in enumerate(responses):
+        coefficients[:len(response), index] = response
+
+    return CalibrationEngine(channels, columns, coefficients, fields, species_names)
+
+
+def _get_array(data, name):
+    """Get an array from either a dictionary or an ArrayData, which may be segmented."""
+    if isinstance(data, dict):
+        return data[name]
+    return get_array(data, name)
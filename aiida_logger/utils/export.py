@@ -0,0 +1,294 @@
+"""
+Bulk export of GC results.
+
+--------------------------
+The data of many parses, e.g. a group or the result of a query, is streamed into one
+dataset for analysis outside of AiiDA. Every row holds the UUID of the source data node,
+the absolute time in UTC, the sample id and one column per channel and label, named
+`<channel>/<label>`, where the columns that a parse does not have are empty.
+
+Parquet and Arrow IPC datasets are partitioned by the date of the first row of each parse,
+with one file per parse, i.e. `date=2019-09-17/<uuid>.parquet`, which can be read as one
+dataset by e.g. `pyarrow.dataset` or `pandas.read_parquet`. HDF5 is written to a single file
+with one extendable dataset per column, where `source` indexes the `sources` UUIDs.
+
+The rows are written in groups of `row_group_rows`, which are loaded by a pool of workers
+a few groups ahead of the writer. Only the segments holding a group are loaded from
+segmented data, such that the memory used is bounded by the groups in flight. Parquet and
+Arrow need the `pyarrow` package and HDF5 the `h5py` package, which are installed with the
+`export` extra.
+"""
+from __future__ import absolute_import
+
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from aiida_logger.utils.array import to_columns
+from aiida_logger.utils.query import to_epoch
+from aiida_logger.utils.segments import SegmentedArrayView, array_names
+
+FORMATS = ('parquet', 'arrow', 'hdf5')
+# Default number of rows written at a time
+DEFAULT_ROW_GROUP_ROWS = 1 << 16
+
+
+def export_data(source, path, file_format='parquet', row_group_rows=DEFAULT_ROW_GROUP_ROWS, workers=None):
+    """
+    Export the data of GC parses to a Parquet, Arrow IPC or HDF5 dataset.
+
+    :param source: a Group or a QueryBuilder of the data nodes, or a list of data nodes or of pairs of
+        the data and metadata nodes of each parse. The metadata holds the labels and the start time,
+        and is taken from the outputs of the process that created the data if it is not given.
+    :param path: the directory of a Parquet or Arrow dataset, or the HDF5 file.
+    :param file_format: one of `parquet`, `arrow` or `hdf5`.
+    :param row_group_rows: the number of rows written at a time.
+    :param workers: the number of workers loading the rows, defaults to the number of processors.
+    :return: a dictionary with the number of exported `nodes` and `rows` and the written `files`.
+    """
+    if file_format not in FORMATS:
+        raise ValueError('Unknown file_format {}, please use {}.'.format(file_format, ', '.join(FORMATS)))
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    # Describe the parses from the database only, to know all columns before writing
+    parses = [_describe(data, metadata) for data, metadata in _resolve(source)]
+    parses = [parse for parse in parses if parse['rows']]
+    columns = []
+    for parse in parses:
+        columns.extend(column for column in parse['columns'] if column not in columns)
+
+    if file_format == 'hdf5':
+        writer = _HDF5Writer(path, columns, row_group_rows)
+    else:
+        writer = _ArrowWriter(path, columns, file_format, row_group_rows)
+    groups = ((parse, start, min(start + row_group_rows, parse['rows'])) for parse in parses
+              for start in range(0, parse['rows'], row_group_rows))
+    rows = 0
+    previous = None
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for parse, group in _prefetch(executor, _load_group, groups, workers):
+                if previous is not None and previous is not parse:
+                    # All groups of the previous parse are written, free its loaded arrays
+                    for view in previous['views'].values():
+                        view.clear()
+                previous = parse
+                writer.write(parse, group)
+                rows = rows + len(group['time'])
+    finally:
+        writer.close()
+
+    return {'nodes': len(parses), 'rows': rows, 'files': writer.files}
+
+
+def _resolve(source):
+    """Yield the data node and metadata node, or None, of each parse in the source."""
+    if hasattr(source, 'iterall'):
+        # A QueryBuilder
+        items = source.all(flat=True)
+    elif hasattr(source, 'nodes') and hasattr(source, 'label'):
+        # A Group
+        items = [node for node in source.nodes if 'row_count' in node.attributes]
+    else:
+        items = source
+    for item in items:
+        if isinstance(item, (tuple, list)):
+            yield item[0], item[1]
+        else:
+            yield item, None
+
+
+def _describe(data, metadata):
+    """Describe the rows and columns of a parse, without loading any of its arrays."""
+    if metadata is None:
+        creator = getattr(data, 'creator', None)
+        if creator is None or 'metadata' not in creator.outputs:
+            raise ValueError('No metadata was given for the data node {} and none was found in the outputs of its '
+                             'creator.'.format(data.uuid))
+        metadata = creator.outputs.metadata
+    metadata = metadata.get_dict()
+    names = array_names(data)
+    channels = sorted((name for name in names if name.startswith('channel_')), key=lambda name: int(name.split('_')[-1]))
+    views = {name: SegmentedArrayView(data, name) for name in channels + ['time', 'id']}
+    columns = []
+    channel_columns = {}
+    for channel, labels in zip(channels, metadata.get('labels') or [[]] * len(channels)):
+        view = views[channel]
+        width = view.shape[1] if len(view.shape) > 1 else len(labels)
+        if len(labels) != width:
+            labels = ['column_{}'.format(index) for index in range(width)]
+        channel_columns[channel] = ['{}/{}'.format(channel, label) for label in labels]
+        columns.extend(channel_columns[channel])
+    start_time = metadata['start_time']
+    try:
+        date = data.get_attribute('start_time')[:10]
+    except (AttributeError, KeyError, TypeError):
+        date = str(start_time)[:10]
+
+    return {
+        'uuid': data.uuid,
+        'rows': len(views['time']),
+        'views': views,
+        'columns': columns,
+        'channel_columns': channel_columns,
+        'start_ns': _epoch_nanoseconds(start_time),
+        'date': date,
+    }
+
+
+def _epoch_nanoseconds(start_time):
+    """Return the start time of a parse as integer nanoseconds since the epoch, without rounding."""
+    if isinstance(start_time, str) and start_time.endswith('Z'):
+        return int(np.datetime64(start_time.rstrip('Z'), 'ns').astype(np.int64))
+    return int(round(to_epoch(start_time) * 1e9))
+
+
+def _load_group(parse, start, stop):
+    """Load the rows of a group of a parse and convert the time to nanoseconds since the epoch."""
+    views = parse['views']
+    time = views['time'][start:stop]
+    if time.dtype.kind != 'i':
+        time = parse['start_ns'] + np.rint(time * 1e9).astype(np.int64)
+    if len(views['id']) == parse['rows']:
+        sample_id = views['id'][start:stop]
+    else:
+        # Older parses only stored the sample id of the last row
+        sample_id = np.zeros(stop - start, dtype=np.int64)
+    group = {'time': time, 'id': np.asarray(sample_id, dtype=np.int64)}
+    for channel, columns in parse['channel_columns'].items():
+        values = to_columns(views[channel][start:stop]).reshape(stop - start, -1)
+        for index, column in enumerate(columns):
+            group[column] = values[:, index]
+    return group
+
+
+def _prefetch(executor, function, tasks, ahead):
+    """Apply a function to the tasks in the executor, keeping a bounded number of tasks ahead, in order."""
+    pending = deque()
+    for task in tasks:
+        pending.append((task[0], executor.submit(function, *task)))
+        if len(pending) > ahead:
+            parse, future = pending.popleft()
+            yield parse, future.result()
+    while pending:
+        parse, future = pending.popleft()
+        yield parse, future.result()
+
+
+class _ArrowWriter():
+    """Write a Parquet or Arrow IPC dataset partitioned by date, with one file per parse."""
+    def __init__(self, path, columns, file_format, row_group_rows):
+        try:
+            import pyarrow
+        except ImportError:
+            raise ValueError('Exporting to {} needs the pyarrow package, please install the export extra.'.format(
+                file_format))
+        self.pyarrow = pyarrow
+        self.path = path
+        self.columns = columns
+        self.file_format = file_format
+        self.row_group_rows = row_group_rows
+        self.schema = pyarrow.schema([('source_uuid', pyarrow.string()), ('time', pyarrow.timestamp('ns', tz='UTC')),
+                                      ('sample_id', pyarrow.int64())] +
+                                     [(column, pyarrow.float64()) for column in columns])
+        self.files = []
+        self._uuid = None
+        self._writer = None
+
+    def write(self, parse, group):
+        """Write a group of rows of a parse, opening the file of the parse on its first group."""
+        pyarrow = self.pyarrow
+        if parse['uuid'] != self._uuid:
+            self._close_file()
+            directory = os.path.join(self.path, 'date={}'.format(parse['date']))
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            filename = os.path.join(directory, '{}.{}'.format(parse['uuid'], self.file_format))
+            if self.file_format == 'parquet':
+                from pyarrow import parquet
+                self._writer = parquet.ParquetWriter(filename, self.schema)
+            else:
+                from pyarrow import ipc
+                self._writer = ipc.new_file(filename, self.schema)
+            self._uuid = parse['uuid']
+            self.files.append(filename)
+        rows = len(group['time'])
+        arrays = [
+            pyarrow.array([parse['uuid']] * rows, type=pyarrow.string()),
+            pyarrow.array(group['time'], type=pyarrow.int64()).cast(self.schema.field('time').type),
+            pyarrow.array(group['id'], type=pyarrow.int64()),
+        ]
+        for column in self.columns:
+            if column in group:
+                arrays.append(pyarrow.array(np.asarray(group[column], dtype=np.float64), type=pyarrow.float64()))
+            else:
+                arrays.append(pyarrow.nulls(rows, type=pyarrow.float64()))
+        batch = pyarrow.RecordBatch.from_arrays(arrays, schema=self.schema)
+        if self.file_format == 'parquet':
+            self._writer.write_table(pyarrow.Table.from_batches([batch]), row_group_size=self.row_group_rows)
+        else:
+            self._writer.write_batch(batch)
+
+    def close(self):
+        """Close the file that is being written."""
+        self._close_file()
+
+    def _close_file(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class _HDF5Writer():
+    """Write all parses to one HDF5 file with one extendable dataset per column."""
+    def __init__(self, path, columns, row_group_rows):
+        try:
+            import h5py
+        except ImportError:
+            raise ValueError('Exporting to hdf5 needs the h5py package, please install the export extra.')
+        self.h5py = h5py
+        self.columns = columns
+        self.files = [path]
+        self._file = h5py.File(path, 'w')
+        self._sources = []
+        self._size = 0
+        chunks = (max(min(row_group_rows, 1 << 20), 1), )
+        self._datasets = {
+            'time': self._create('time', np.int64, chunks),
+            'sample_id': self._create('sample_id', np.int64, chunks),
+            'source': self._create('source', np.int32, chunks),
+        }
+        self._datasets['time'].attrs['unit'] = 'ns since the epoch in UTC'
+        for column in columns:
+            # The channel becomes a group with a dataset per label
+            self._datasets[column] = self._create(column, np.float64, chunks, fillvalue=np.nan)
+
+    def _create(self, name, dtype, chunks, fillvalue=None):
+        """Create an empty dataset that can be extended."""
+        return self._file.create_dataset(name, shape=(0, ), maxshape=(None, ), dtype=dtype, chunks=chunks,
+                                         fillvalue=fillvalue)
+
+    def write(self, parse, group):
+        """Append a group of rows of a parse to all datasets."""
+        if not self._sources or self._sources[-1] != parse['uuid']:
+            self._sources.append(parse['uuid'])
+        rows = len(group['time'])
+        start, stop = self._size, self._size + rows
+        for dataset in self._datasets.values():
+            dataset.resize((stop, ))
+        self._datasets['time'][start:stop] = group['time']
+        self._datasets['sample_id'][start:stop] = group['id']
+        self._datasets['source'][start:stop] = len(self._sources) - 1
+        for column in self.columns:
+            if column in group:
+                self._datasets[column][start:stop] = group[column]
+        self._size = stop
+
+    def close(self):
+        """Write the UUIDs of the sources and close the file."""
+        if self._file:
+            self._file.create_dataset('sources', data=np.array(self._sources, dtype='S36'))
+            self._file.close()
@@ -14,6 +14,16 @@ import pytest
 # houses aiida_local_code_factory among others
 pytest_plugins = ['aiida.manage.tests.pytest_fixtures']
 
+# The data layout of the two channels in the gc example datafile, input_files/gc_example.txt
+GC_EXAMPLE_SPECIES = ['He', 'H2', 'O2', 'N2', 'CH4', 'CO']
+GC_EXAMPLE_LAYOUT = [[{'time': '%m/%d/%y %H:%M:%S'}, {'id': 'int'}] +
+                     [{'{} concentration'.format(species): 'float'} for species in GC_EXAMPLE_SPECIES] +
+                     [{'ignore': 'float'}] +
+                     [{'{} area'.format(species): 'float'} for species in GC_EXAMPLE_SPECIES],
+                     [{'time': '%m/%d/%y %H:%M:%S'}, {'id': 'int'}, {'CO2 concentration': 'float'},
+                      {'H2O concentration': 'float'}, {'ignore': 'float'}, {'CO2 area': 'float'},
+                      {'H2O area': 'float'}]]
+
 
 @pytest.fixture(scope='function')
 def fixture_retrieved():
@@ -25,3 +35,48 @@ def fixture_retrieved():
     retrieved.put_object_from_tree(path=os.path.join(TEST_DIR, 'input_files'))
 
     return retrieved
+
+
+class SyntheticGC():
+    """
+    A synthetic gc datafile in a directory, which is parsed with the GC parser.
+
+    :param directory: the directory, e.g. the `tmpdir` of a test, in which the datafile is written.
+    :param rows: the number of data rows.
+    :param filename: the name of the datafile.
+    :param kwargs: the options of :func:`aiida_logger.utils.synthetic.write_synthetic_log`.
+    """
+    def __init__(self, directory, rows, filename='synthetic.txt', **kwargs):
+        from aiida.plugins import CalculationFactory
+        from aiida_logger.utils.synthetic import write_synthetic_log
+
+        with directory.join(filename).open('w') as handle:
+            self.parameters = write_synthetic_log(handle, rows, **kwargs)
+        self.directory = directory
+        self.filename = filename
+        self.exit_codes = CalculationFactory('arithmetic.add').exit_codes
+
+    def retrieved(self):
+        """Return a retrieved folder with the files in the directory."""
+        from aiida.plugins import DataFactory
+
+        retrieved = DataFactory('folder')()
+        retrieved.put_object_from_tree(path=str(self.directory))
+        return retrieved
+
+    def parse(self, **kwargs):
+        """Parse the datafile with the parameters of the synthetic log, updated with kwargs."""
+        from aiida.plugins import DataFactory
+        from aiida_logger.parsers.file_parsers.gc import GCParser
+
+        parameters = DataFactory('dict')(dict=dict(self.parameters, **kwargs))
+        return GCParser(self.retrieved(), self.filename, self.exit_codes, parameters).parse()
+
+
+@pytest.fixture(scope='function')
+def fixture_synthetic_gc(tmpdir):
+    """Return a function writing a synthetic gc datafile with the given number of rows, see `SyntheticGC`."""
+    def write(rows, **kwargs):
+        return SyntheticGC(tmpdir, rows, **kwargs)
+
+    return write
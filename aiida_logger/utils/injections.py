@@ -0,0 +1,92 @@
+"""
+Index of the injections of a GC series.
+
+---------------------------------------
+Every row of a GC series is one injection, marked by the sample id of the sample that
+was injected. Consecutive injections of the same sample form a run. The index holds one
+row per run with the sample id, the first row and the row after the last row of the run,
+sorted by the sample id, such that the rows of any set of samples, or of the n-th
+injection of a sample, are found by a binary search without reading the id column or
+any of the channels. Only the rows that are looked up are then loaded, also when the
+arrays are stored in segments.
+"""
+from __future__ import absolute_import
+
+import numpy as np
+
+from aiida_logger.utils.segments import SegmentedArrayView
+
+INJECTION_INDEX = 'injection_index'
+
+
+def build_injection_index(sample_id):
+    """
+    Build the index of the runs of consecutive rows with the same sample id.
+
+    :param sample_id: the sample id of each row.
+    :return: an int64 array with one row of the sample id, the first row and the row after the last
+        row of each run, sorted by the sample id and then by the first row.
+    """
+    sample_id = np.atleast_1d(sample_id)
+    if not len(sample_id):
+        return np.empty((0, 3), dtype=np.int64)
+    starts = np.flatnonzero(np.concatenate(([True], sample_id[1:] != sample_id[:-1])))
+    ends = np.append(starts[1:], len(sample_id))
+    index = np.stack([sample_id[starts].astype(np.int64), starts, ends], axis=1)
+    return index[np.lexsort((index[:, 1], index[:, 0]))]
+
+
+def injection_rows(index, sample_ids, injection=None):
+    """
+    Return the rows of the injections of the given samples.
+
+    :param index: the injection index, see :func:`build_injection_index`.
+    :param sample_ids: a sample id or a list of sample ids.
+    :param injection: if given, only the row of the n-th injection of each sample is returned,
+        counting from zero, and samples with fewer injections are skipped. Negative numbers
+        count from the last injection.
+    :return: the sorted row numbers as an int64 array.
+    """
+    sample_ids = np.unique(np.atleast_1d(sample_ids).astype(np.int64))
+    first = np.searchsorted(index[:, 0], sample_ids, side='left')
+    last = np.searchsorted(index[:, 0], sample_ids, side='right')
+    rows = []
+    for lower, upper in zip(first, last):
+        runs = index[lower:upper]
+        sample_rows = np.concatenate([np.arange(start, end) for _, start, end in runs]) if len(runs) else []
+        if injection is None:
+            rows.append(np.asarray(sample_rows, dtype=np.int64))
+        elif -len(sample_rows) <= injection < len(sample_rows):
+            rows.append(np.array([sample_rows[injection]], dtype=np.int64))
+    if not rows:
+        return np.empty(0, dtype=np.int64)
+    return np.sort(np.concatenate(rows))
+
+
+def select_injections(data, sample_ids, names=None, injection=None):
+    """
+    Load the rows of the injections of the given samples from an ArrayData.
+
+    Only the arrays that are named are read and, for segmented arrays, only the segments holding
+    the selected rows.
+
+    :param data: the ArrayData of a parse, with the injection index.
+    :param sample_ids: a sample id or a list of sample ids.
+    :param names: the names of the arrays to load, defaults to `time` and `id`.
+    :param injection: if given, only the n-th injection of each sample is selected, see :func:`injection_rows`.
+    :return: a dictionary with the selected rows of each named array and the row numbers as `rows`.
+    """
+    if names is None:
+        names = ['time', 'id']
+    rows = injection_rows(data.get_array(INJECTION_INDEX), sample_ids, injection)
+    selected = {'rows': rows}
+    for name in names:
+        view = SegmentedArrayView(data, name)
+        if not len(rows):
+            selected[name] = view[0:0]
+            continue
+        # Load the range of rows of each run at a time
+        breaks = np.flatnonzero(np.diff(rows) != 1) + 1
+        parts = [view[int(run[0]):int(run[-1]) + 1] for run in np.split(rows, breaks)]
+        selected[name] = np.concatenate(parts)
+    return selected
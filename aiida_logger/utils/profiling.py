@@ -0,0 +1,105 @@
+"""
+Instrumentation of the parsing stages.
+
+--------------------------------------
+Records the wall time, number of calls, number of rows and peak allocation of each stage
+of a parse, such that slow parses can be diagnosed from the stored metadata. Disabled
+profilers return a shared no-op context for every stage and cost next to nothing.
+"""
+from __future__ import absolute_import
+
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class _NoStage():  # pylint: disable=too-few-public-methods
+    """A context manager that does nothing, used when profiling is disabled."""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+_NO_STAGE = _NoStage()
+
+
+class StageProfiler():
+    """
+    Profiler of the stages of a parse.
+
+    The peak allocation is measured with tracemalloc and is process wide, such that it also
+    includes allocations made by other threads while the stage runs.
+    """
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.stages = {}
+        self._started_tracing = False
+        # The allocated memory at the start and the peak so far of the stages that are entered
+        self._open_stages = []
+
+    def start(self):
+        """Start tracing memory allocations, unless this is already done by someone else."""
+        if self.enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def stop(self):
+        """Stop tracing memory allocations if it was started by this profiler."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def stage(self, name, rows=0):
+        """Return a context manager that records the stage with the given name."""
+        if not self.enabled:
+            return _NO_STAGE
+        return self._stage(name, rows)
+
+    @contextmanager
+    def _stage(self, name, rows):
+        """Record the wall time and peak allocation of the enclosed code."""
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            if hasattr(tracemalloc, 'reset_peak'):
+                # Make sure the peak of an enclosing stage survives the reset
+                if self._open_stages:
+                    self._open_stages[-1][1] = max(self._open_stages[-1][1], peak)
+                tracemalloc.reset_peak()
+            self._open_stages.append([current, 0])
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            record = self.stages.setdefault(name, {'seconds': 0.0, 'calls': 0, 'rows': 0, 'peak_bytes': 0})
+            record['seconds'] = record['seconds'] + seconds
+            record['calls'] = record['calls'] + 1
+            record['rows'] = record['rows'] + rows
+            if tracing:
+                current, peak = self._open_stages.pop()
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                if self._open_stages:
+                    self._open_stages[-1][1] = max(self._open_stages[-1][1], peak)
+                record['peak_bytes'] = max(record['peak_bytes'], peak - current)
+
+    def add_rows(self, name, rows):
+        """Add rows to a stage that has already been recorded."""
+        if self.enabled and name in self.stages:
+            self.stages[name]['rows'] = self.stages[name]['rows'] + rows
+
+    def as_dict(self):
+        """Return the recorded stages as a dictionary that can be stored in a Dict node."""
+        return {'stages': {name: dict(record) for name, record in self.stages.items()}}
+
+
+def format_profile(profile):
+    """Format a profile dictionary as returned by `StageProfiler.as_dict` for the process log."""
+    lines = []
+    for name, record in profile['stages'].items():
+        lines.append('{}: {:.4f} s in {} call(s), {} rows, {:.2f} MB peak'.format(name, record['seconds'],
+                                                                                   record['calls'], record['rows'],
+                                                                                   record['peak_bytes'] / 1e6))
+    return '\n'.join(lines)
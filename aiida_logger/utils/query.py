@@ -0,0 +1,99 @@
+"""
+Discovery of parsed GC data.
+
+----------------------------
+The `data` ArrayData of a parse carries its time range, number of rows, channels and
+labels as attributes, such that the data covering a period is found with a single query
+on the database, without reading the arrays from the repository. The times are stored
+as seconds since the epoch in UTC, which can be compared in the query.
+"""
+from __future__ import absolute_import
+
+from datetime import datetime, timezone
+
+import numpy as np
+
+
+def summary_attributes(arrays, metadata):
+    """
+    Summarize a parsed series in attributes that can be queried.
+
+    :param arrays: the dictionary of arrays of a parse, with the `time` as seconds relative to the
+        `start_time` in the metadata or as nanoseconds since the epoch.
+    :param metadata: the metadata dictionary of a parse.
+    :return: a dictionary with the `row_count`, the `channels` and the `labels`, and for a series with
+        rows the `start_epoch` and `end_epoch` in seconds since the epoch and the `start_time` and
+        `end_time` in ISO 8601. Empty if the arrays have no time.
+    """
+    if 'time' not in arrays:
+        return {}
+    time = np.atleast_1d(arrays['time'])
+    attributes = {
+        'row_count': int(len(time)),
+        'channels': sorted(name for name in arrays if name.startswith('channel_')),
+        'labels': sorted({label for labels in metadata.get('labels') or [] for label in labels}),
+    }
+    if not len(time):
+        return attributes
+    if time.dtype.kind == 'i':
+        # Nanoseconds since the epoch
+        start, end = time.min() / 1e9, time.max() / 1e9
+    else:
+        reference = to_epoch(metadata['start_time'])
+        start, end = reference + float(time.min()), reference + float(time.max())
+    attributes.update({
+        'start_epoch': float(start),
+        'end_epoch': float(end),
+        'start_time': _isoformat(start),
+        'end_time': _isoformat(end),
+    })
+    return attributes
+
+
+def find_data(start=None, end=None, channels=None, labels=None):
+    """
+    Find the data of the GC parses that overlap a time window, in one query.
+
+    :param start: the start of the window, as a datetime or seconds since the epoch, or None.
+    :param end: the end of the window, as a datetime or seconds since the epoch, or None.
+    :param channels: if given, only data with all of these channels, e.g. `['channel_1']`.
+    :param labels: if given, only data with all of these labels, e.g. `['He area']`.
+    :return: a list of the ArrayData, ordered by their start time.
+    """
+    from aiida.orm import ArrayData, QueryBuilder
+
+    filters = {'attributes': {'has_key': 'row_count'}}
+    if start is not None:
+        filters['attributes.end_epoch'] = {'>=': to_epoch(start)}
+    if end is not None:
+        filters['attributes.start_epoch'] = {'<=': to_epoch(end)}
+    if channels:
+        filters['attributes.channels'] = {'contains': list(channels)}
+    if labels:
+        filters['attributes.labels'] = {'contains': list(labels)}
+    builder = QueryBuilder()
+    builder.append(ArrayData, filters=filters, tag='data')
+    builder.order_by({'data': [{'attributes.start_epoch': {'order': 'asc', 'cast': 'f'}}]})
+
+    return builder.all(flat=True)
+
+
+def to_epoch(value):
+    """
+    Return seconds since the epoch for a datetime, an ISO 8601 string or a number.
+
+    Datetimes and strings without a timezone are assumed to be in UTC.
+    """
+    if isinstance(value, str):
+        from dateutil import parser
+        value = parser.isoparse(value) if 'T' in value else parser.parse(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    return float(value)
+
+
+def _isoformat(epoch):
+    """Return seconds since the epoch as an ISO 8601 string in UTC."""
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
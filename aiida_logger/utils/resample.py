@@ -0,0 +1,93 @@
+"""
+Resampling of GC series.
+
+------------------------
+The rows of a series are binned on a fixed time grid and each bin is reduced with one
+or more of the reductions mean, min, max, last and count. The rows are sorted by time
+once and all bins of all columns are then reduced in one vectorized call per reduction.
+
+The grid is laid on the absolute time, i.e. seconds since the epoch, with bins starting at
+the multiples of the interval from the origin, such that series with different start times
+are resampled on the same grid and can be compared or concatenated bin by bin.
+"""
+from __future__ import absolute_import
+
+import numpy as np
+
+REDUCTIONS = ('mean', 'min', 'max', 'last', 'count')
+DEFAULT_REDUCTIONS = ('mean', )
+
+
+def resample(time, arrays, interval, reductions=DEFAULT_REDUCTIONS, origin=0.0, fill_empty=False, offset=0.0):  # pylint: disable=too-many-arguments,too-many-locals
+    """
+    Resample arrays on a fixed time grid.
+
+    :param time: the time of each row in seconds, relative to the offset.
+    :param arrays: a dictionary of arrays with one row per time, e.g. the channels of a parse.
+    :param interval: the width of the bins in seconds.
+    :param reductions: the reductions applied to each bin, see `REDUCTIONS`.
+    :param origin: the time in seconds since the epoch at which a bin starts, bins also extend before it.
+        The default aligns the bins to the multiples of the interval since the epoch.
+    :param fill_empty: if True, all bins between the first and the last are returned, where the empty
+        bins have a count of zero and NaN for the other reductions. Otherwise only bins with rows are returned.
+    :param offset: the time in seconds since the epoch of the zero of `time`, e.g. the start time of a parse.
+    :return: a dictionary with the start time of each bin in seconds since the epoch as `time`, the number of rows of each bin as
+        `count` if requested, and each array reduced as `<name>_<reduction>`.
+    """
+    unknown = [reduction for reduction in reductions if reduction not in REDUCTIONS]
+    if unknown:
+        raise ValueError('Unknown reductions {}, please use {}.'.format(unknown, ', '.join(REDUCTIONS)))
+    if interval <= 0:
+        raise ValueError('The interval must be positive.')
+    time = np.asarray(time, dtype=np.float64)
+    if not len(time):
+        raise ValueError('There are no rows to resample.')
+
+    # Split the distance from the origin to the offset in whole bins and a remainder, such that
+    # the relative times are binned without adding the large epoch to each of them
+    shift, remainder = divmod(float(offset) - float(origin), float(interval))
+    bins = np.floor((time + remainder) / interval).astype(np.int64) + int(shift)
+
+    # Sort the rows by bin and by time within each bin, such that last is the latest row
+    order = np.lexsort((time, bins))
+    bins = bins[order]
+    starts = np.flatnonzero(np.concatenate(([True], bins[1:] != bins[:-1])))
+    ends = np.append(starts[1:], len(bins))
+    counts = ends - starts
+    occupied = bins[starts]
+
+    if fill_empty:
+        grid = np.arange(occupied[0], occupied[-1] + 1)
+        positions = occupied - occupied[0]
+    else:
+        grid = occupied
+        positions = None
+
+    result = {'time': origin + grid * float(interval)}
+    if 'count' in reductions:
+        result['count'] = _place(counts, positions, len(grid), 0)
+    for name, array in arrays.items():
+        values = np.asarray(array, dtype=np.float64)[order]
+        for reduction in reductions:
+            if reduction == 'count':
+                continue
+            if reduction == 'mean':
+                reduced = np.add.reduceat(values, starts, axis=0) / counts.reshape((-1, ) + (1, ) * (values.ndim - 1))
+            elif reduction == 'min':
+                reduced = np.minimum.reduceat(values, starts, axis=0)
+            elif reduction == 'max':
+                reduced = np.maximum.reduceat(values, starts, axis=0)
+            else:
+                reduced = values[ends - 1]
+            result['{}_{}'.format(name, reduction)] = _place(reduced, positions, len(grid), np.nan)
+
+    return result
+
+
+def _place(reduced, positions, size, fill_value):
+    """Place the reductions of the occupied bins on the full grid, if one is used."""
+    if positions is None:
+        return reduced
+    full = np.full((size, ) + reduced.shape[1:], fill_value, dtype=np.result_type(reduced, type(fill_value)))
+    full[positions] = reduced
+    return full
@@ -0,0 +1,194 @@
+"""
+Segmented arrays.
+
+-----------------
+Long series can be stored as segments of a fixed number of rows, named `<name>_segment_<index>`,
+together with a `segments` array holding the first row and the time bounds of each segment.
+A :class:`SegmentedArrayView` presents the segments of one array as one logical array and
+only loads the segments that overlap the rows that are asked for, such that the memory used
+for a window of the series is bounded by the window and not by the length of the series.
+"""
+from __future__ import absolute_import
+
+import threading
+
+import numpy as np
+
+SEGMENTS = 'segments'
+SEGMENT_NAME = '{}_segment_{:06d}'
+
+
+def segment_arrays(arrays, segment_rows, time_name='time', unsegmented=()):
+    """
+    Split the arrays with one row per time into segments.
+
+    :param arrays: a dictionary of arrays, including the time in seconds.
+    :param segment_rows: the number of rows of each segment.
+    :param time_name: the name of the time array.
+    :param unsegmented: the names of arrays that are stored as they are, also when they happen to have one
+        row per time.
+    :return: a dictionary with the segments and the other arrays as they are, and a `segments` array
+        with one row of the first row, the minimum time and the maximum time of each segment.
+    """
+    if segment_rows <= 0:
+        raise ValueError('The number of rows of a segment must be positive.')
+    time = arrays[time_name]
+    starts = np.arange(0, len(time), segment_rows)
+    segmented = {}
+    for name, array in arrays.items():
+        if array.ndim and len(array) == len(time) and name not in unsegmented:
+            for index, start in enumerate(starts):
+                segmented[SEGMENT_NAME.format(name, index)] = array[start:start + segment_rows]
+        else:
+            segmented[name] = array
+    # Exact bounds also for a time in integer nanoseconds
+    bounds = np.empty((len(starts), 3), dtype=np.result_type(time.dtype, np.int64))
+    bounds[:, 0] = starts
+    if len(starts):
+        bounds[:, 1] = np.minimum.reduceat(time, starts)
+        bounds[:, 2] = np.maximum.reduceat(time, starts)
+    segmented[SEGMENTS] = bounds
+
+    return segmented
+
+
+def is_segmented(data):
+    """Return whether the arrays of an ArrayData are segmented."""
+    return SEGMENTS in data.get_arraynames()
+
+
+def array_names(data):
+    """Return the logical names of the arrays of an ArrayData, whether it is segmented or not."""
+    names = []
+    for name in data.get_arraynames():
+        if name == SEGMENTS and is_segmented(data):
+            continue
+        base, _, index = name.rpartition('_segment_')
+        if base and index.isdigit():
+            name = base
+        if name not in names:
+            names.append(name)
+    return names
+
+
+def get_array(data, name):
+    """Return a whole array of an ArrayData, concatenating its segments if it is segmented."""
+    if name in data.get_arraynames():
+        return data.get_array(name)
+    return SegmentedArrayView(data, name)[:]
+
+
+class SegmentedArrayView():
+    """
+    A read only view of an array of an ArrayData that is stored in segments.
+
+    The view supports `len`, `shape` and indexing with an integer or a slice along the rows, optionally
+    followed by an index along the columns. Only the segments that hold the selected rows are loaded.
+    Arrays that are not segmented are presented in the same way. A view can be read by several
+    threads at the same time.
+
+    :param data: the ArrayData.
+    :param name: the logical name of the array, e.g. `channel_1`.
+    """
+    def __init__(self, data, name):
+        self.data = data
+        self.name = name
+        names = data.get_arraynames()
+        if name in names:
+            # Not segmented, present the whole array as one segment
+            self._segments = [name]
+            rows = [data.get_shape(name)[0] if data.get_shape(name) else 1]
+            self._bounds = None
+        else:
+            self._segments = [SEGMENT_NAME.format(name, index) for index in range(len(data.get_array(SEGMENTS)))]
+            missing = [segment for segment in self._segments if segment not in names]
+            if missing or not self._segments:
+                raise KeyError('The array {} is not in the ArrayData.'.format(name))
+            rows = [data.get_shape(segment)[0] for segment in self._segments]
+            self._bounds = data.get_array(SEGMENTS)
+        self._starts = np.concatenate(([0], np.cumsum(rows)))
+        # The last loaded segment, as consecutive reads often fall in the same segment
+        self._loaded = (None, None)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return int(self._starts[-1])
+
+    @property
+    def shape(self):
+        """Return the shape of the logical array."""
+        return (len(self), ) + tuple(self.data.get_shape(self._segments[0])[1:])
+
+    def __getitem__(self, key):
+        rest = ()
+        if isinstance(key, tuple):
+            key, rest = key[0], key[1:]
+        if isinstance(key, (int, np.integer)):
+            index = int(key) + len(self) if key < 0 else int(key)
+            if not 0 <= index < len(self):
+                raise IndexError('Index {} is out of bounds for {} rows.'.format(key, len(self)))
+            return self._rows(index, index + 1)[(0, ) + rest]
+        if not isinstance(key, slice):
+            raise TypeError('Only integers and slices are supported along the rows.')
+        indices = range(*key.indices(len(self)))
+        if not indices:
+            return self._rows(0, 0)[(slice(None), ) + rest]
+        low = min(indices[0], indices[-1])
+        rows = self._rows(low, max(indices[0], indices[-1]) + 1)
+        if indices.step < 0:
+            return rows[np.asarray(indices) - low][(slice(None), ) + rest]
+        return rows[(slice(None, None, indices.step), ) + rest]
+
+    def _rows(self, start, stop):
+        """Load the rows from start to stop from the segments that hold them."""
+        first = np.searchsorted(self._starts, start, side='right') - 1
+        last = np.searchsorted(self._starts, stop, side='left')
+        parts = [self._segment(index) for index in range(first, max(first + 1, last))]
+        rows = np.concatenate(parts) if len(parts) > 1 else parts[0]
+        offset = self._starts[first]
+        return rows[start - offset:stop - offset]
+
+    def _segment(self, index):
+        """Load a segment, reusing the last loaded segment."""
+        with self._lock:
+            loaded_index, segment = self._loaded
+        if loaded_index == index:
+            return segment
+        # Load outside of the lock, such that threads reading different segments do not wait on each other
+        segment = self.data.get_array(self._segments[index])
+        with self._lock:
+            self._loaded = (index, segment)
+        return segment
+
+    def clear(self):
+        """Forget the last loaded segment, such that its memory can be freed."""
+        with self._lock:
+            self._loaded = (None, None)
+
+    def time_slice(self, start=None, end=None, time_name='time'):
+        """
+        Return the slice of the rows with a time in the window from start to end, exclusive.
+
+        Only the time segments that overlap the window are loaded. The times are assumed to increase.
+
+        :param start: the start of the window in seconds, or None.
+        :param end: the end of the window in seconds, or None.
+        """
+        time = SegmentedArrayView(self.data, time_name)
+        bounds = time._bounds  # pylint: disable=protected-access
+        if bounds is None:
+            bounds = np.array([[0, -np.inf, np.inf]])
+        # The segments that overlap the window
+        overlap = np.ones(len(bounds), dtype=bool)
+        if start is not None:
+            overlap = overlap & (bounds[:, 2] >= start)
+        if end is not None:
+            overlap = overlap & (bounds[:, 1] < end)
+        segments = np.flatnonzero(overlap)
+        if not len(segments):
+            return slice(0, 0)
+        first = int(time._starts[segments[0]])  # pylint: disable=protected-access
+        times = time._rows(first, int(time._starts[segments[-1] + 1]))  # pylint: disable=protected-access
+        lower = 0 if start is None else np.searchsorted(times, start, side='left')
+        upper = len(times) if end is None else np.searchsorted(times, end, side='left')
+        return slice(first + int(lower), first + int(upper))
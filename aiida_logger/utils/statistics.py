@@ -0,0 +1,79 @@
+"""
+Running statistics of the columns of a series.
+
+-----------------------------------------------
+The statistics are updated block by block while a series is parsed, such that they cost
+no extra pass over the data. The mean and variance of each block are combined with those
+of the previous blocks with the pairwise update of Chan et al., which is numerically stable
+for long series. NaN values are counted, and left out of the other statistics.
+"""
+from __future__ import absolute_import
+
+import numpy as np
+
+STATISTICS = ('count', 'nan_count', 'min', 'max', 'mean', 'std', 'first', 'last')
+
+
+class ColumnStatistics():
+    """
+    Running count, NaN count, minimum, maximum, mean, standard deviation, first and last value of each column.
+
+    :param columns: the number of columns.
+    """
+    def __init__(self, columns):
+        self.rows = 0
+        self.count = np.zeros(columns, dtype=np.int64)
+        self.minimum = np.full(columns, np.nan)
+        self.maximum = np.full(columns, np.nan)
+        self.mean = np.zeros(columns)
+        self._squares = np.zeros(columns)
+        self.first = None
+        self.last = None
+
+    def add(self, values):
+        """Update the statistics with a block of rows with one value per column."""
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return
+        valid = ~np.isnan(values)
+        count = valid.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(valid, values, 0.0).sum(axis=0) / count
+            squares = np.where(valid, values - mean, 0.0)
+            squares = (squares * squares).sum(axis=0)
+            total = self.count + count
+            delta = np.where(count > 0, mean - self.mean, 0.0)
+            self.mean = np.where(total > 0, self.mean + delta * count / total, 0.0)
+            self._squares = np.where(total > 0, self._squares + squares + delta * delta * self.count * count / total,
+                                     0.0)
+        self.count = total
+        self.minimum = np.fmin(self.minimum, np.fmin.reduce(values, axis=0))
+        self.maximum = np.fmax(self.maximum, np.fmax.reduce(values, axis=0))
+        if self.first is None:
+            self.first = values[0]
+        self.last = values[-1]
+        self.rows = self.rows + len(values)
+
+    def as_dict(self, labels):
+        """
+        Return the statistics keyed by the label of each column.
+
+        :param labels: the label of each column.
+        :return: a dictionary with the statistics of each column, see `STATISTICS`. The `count` is the
+            number of values that are not NaN, and statistics that are undefined are None.
+        """
+        with np.errstate(invalid='ignore'):
+            std = np.sqrt(self._squares / self.count)
+        empty = np.full(len(labels), np.nan)
+        columns = zip(self.count, self.minimum, self.maximum, np.where(self.count > 0, self.mean, np.nan), std,
+                      empty if self.first is None else self.first, empty if self.last is None else self.last)
+        statistics = {}
+        for label, column in zip(labels, columns):
+            count, values = int(column[0]), [_value(value) for value in column[1:]]
+            statistics[label] = dict(zip(STATISTICS, [count, self.rows - count] + values))
+        return statistics
+
+
+def _value(value):
+    """Return a value as a float that can be stored as JSON, where NaN is None."""
+    return None if np.isnan(value) else float(value)
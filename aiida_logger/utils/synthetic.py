@@ -0,0 +1,107 @@
+"""
+Generation of synthetic GC logs.
+
+--------------------------------
+Writes logs in the same layout as the exports of our gas chromatograph: two header rows
+naming the channel, species and quantity of each column, followed by one tab separated
+row per injection with the time, sample id and quantities of every channel. Used for
+testing and benchmarking the parsers on files of any size.
+"""
+from __future__ import absolute_import
+
+from datetime import datetime, timedelta
+
+import numpy as np
+
+DEFAULT_SPECIES = ('Helium', 'Hydrogen', 'Oxygen', 'Nitrogen', 'Methane', 'CO', 'CO2', 'H2O')
+DEFAULT_QUANTITIES = ('ESTD Concentration', 'Area')
+DEFAULT_TIME_FORMAT = '%m/%d/%Y %H:%M:%S'
+DEFAULT_TIME_SUFFIX = ' (GMT +01:00)'
+
+
+def synthetic_layout(channels=2, species=4, quantities=DEFAULT_QUANTITIES, ignore_columns=True,
+                     time_format=DEFAULT_TIME_FORMAT):  # pylint: disable=too-many-arguments
+    """
+    Compose the data layout of a synthetic log.
+
+    :param channels: the number of channels.
+    :param species: the number of species per channel.
+    :param quantities: the quantities reported for each species, e.g. concentration and area.
+    :param ignore_columns: if True, an empty column separates the quantities, as in the exports of the GC.
+    :param time_format: the format of the timestamps.
+    :return: the data layout as given in the parameters of the GC parser.
+    """
+    layout = []
+    for _ in range(channels):
+        channel = [{'time': time_format}, {'id': 'int'}]
+        for index, quantity in enumerate(quantities):
+            if ignore_columns and index > 0:
+                channel.append({'ignore': 'float'})
+            channel.extend([{
+                '{} {}'.format(_species_name(item), quantity.split()[-1].lower()): 'float'
+            } for item in range(species)])
+        layout.append(channel)
+
+    return layout
+
+
+def write_synthetic_log(file_handle, rows, channels=2, species=4, quantities=DEFAULT_QUANTITIES, ignore_columns=True,
+                        time_format=DEFAULT_TIME_FORMAT, time_suffix=DEFAULT_TIME_SUFFIX, interval=200.0, seed=0,
+                        block_size=10000):  # pylint: disable=too-many-arguments,too-many-locals
+    """
+    Write a synthetic GC log.
+
+    :param file_handle: a file handle opened for writing text.
+    :param rows: the number of data rows.
+    :param interval: the time in seconds between each injection.
+    :param seed: the seed of the random values.
+    :param block_size: the number of rows that are generated and written at a time.
+    :return: the parameters needed to parse the log with the GC parser.
+
+    See :func:`synthetic_layout` for the remaining parameters.
+    """
+    layout = synthetic_layout(channels, species, quantities, ignore_columns, time_format)
+    random = np.random.RandomState(seed)
+
+    # Write the two header rows
+    names = []
+    descriptions = []
+    for channel in range(channels):
+        names.extend(['Channel {}, synthetic'.format(channel + 1), ''])
+        descriptions.extend(['Acquisition Date', 'Sample ID'])
+        for index, quantity in enumerate(quantities):
+            if ignore_columns and index > 0:
+                names.append('')
+                descriptions.append('')
+            names.extend([_species_name(item) for item in range(species)])
+            descriptions.extend([quantity] * species)
+    file_handle.write('\t'.join(names) + '\n')
+    file_handle.write('\t'.join(descriptions) + '\n')
+
+    # Write the data rows in blocks
+    start = datetime(2019, 9, 17, 12, 0, 0)
+    for block_start in range(0, rows, block_size):
+        block_rows = min(block_size, rows - block_start)
+        lines = [[(start + timedelta(seconds=row * interval)).strftime(time_format) + time_suffix,
+                  str(row + 1)] for row in range(block_start, block_start + block_rows)]
+        for channel in range(channels):
+            values = []
+            for index in range(len(quantities)):
+                if ignore_columns and index > 0:
+                    values.append(np.full((block_rows, 1), ''))
+                values.append(np.char.mod('%.4f', random.random_sample((block_rows, species)) * 10.0**(2 + 3 * index)))
+            for line, row_values in zip(lines, np.hstack(values).tolist()):
+                if channel > 0:
+                    # Each channel repeats the time and id
+                    line.extend(line[:2])
+                line.extend(row_values)
+        file_handle.write(''.join(['\t'.join(line) + '\n' for line in lines]))
+
+    return {'data_start_line': 2, 'data_layout': layout, 'separator': '\t'}
+
+
+def _species_name(index):
+    """Return the name of a species, falling back to a numbered name beyond the default species."""
+    if index < len(DEFAULT_SPECIES):
+        return DEFAULT_SPECIES[index]
+    return 'Species {}'.format(index + 1)
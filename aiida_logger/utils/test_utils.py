@@ -0,0 +1,164 @@
+""" Tests for the utilities.
+
+"""
+# pylint: disable=unused-import
+from __future__ import print_function
+from __future__ import absolute_import
+
+import numpy as np
+
+from aiida_logger.utils.fixtures.data import fixture_synthetic_gc  # noqa: F401
+
+LAYOUT = [[{'time': '%m/%d/%y %H:%M:%S'}, {'id': 'int'}, {'He concentration': 'float'}, {'H2 concentration': 'float'},
+           {'ignore': 'float'}, {'He area': 'float'}, {'H2 area': 'float'}],
+          [{'time': '%m/%d/%y %H:%M:%S'}, {'id': 'int'}, {'CO2 concentration': 'float'}, {'ignore': 'float'},
+           {'CO2 area': 'float'}]]
+
+
+def test_calibration():
+    """Test linear and polynomial calibrations applied to several data sets at once."""
+    from aiida_logger.utils.calibration import compile_calibration
+
+    calibration = [[{'He': 2.0}, {'H2': [1.0, 0.5, 0.25]}], [{'CO2': 3.0}]]
+    engine = compile_calibration(calibration, LAYOUT)
+    first = {'channel_1': np.array([[0.1, 0.2, 1.0, 2.0], [0.3, 0.4, 3.0, 4.0]]), 'channel_2': np.array([[0.5, 5.0], [0.6, 6.0]])}
+    second = {'channel_1': np.array([[0.1, 0.2, 10.0, 20.0]]), 'channel_2': np.array([[0.5, 50.0]])}
+
+    results = engine.apply_many([first, second])
+
+    np.testing.assert_allclose(results[0]['channel_1'], [[2.0, 1.0 + 1.0 + 1.0], [6.0, 1.0 + 2.0 + 4.0]])
+    np.testing.assert_allclose(results[0]['channel_2'], [[15.0], [18.0]])
+    np.testing.assert_allclose(results[1]['channel_1'], [[20.0, 1.0 + 10.0 + 100.0]])
+    np.testing.assert_allclose(results[1]['channel_2'], [[150.0]])
+
+    # Channels stored as structured arrays are calibrated by their area fields
+    from aiida_logger.utils.array import to_columns, to_structured
+    labels = [['He concentration', 'H2 concentration', 'He area', 'H2 area'], ['CO2 concentration', 'CO2 area']]
+    structured = {name: to_structured(first[name], channel_labels) for name, channel_labels in zip(sorted(first), labels)}
+    np.testing.assert_array_equal(structured['channel_1']['H2 area'], first['channel_1'][:, 3])
+    result = engine.apply(structured)
+    assert result['channel_1'].dtype.names == ('He', 'H2')
+    np.testing.assert_allclose(to_columns(result['channel_1']), results[0]['channel_1'])
+    np.testing.assert_allclose(result['channel_2']['CO2'], [15.0, 18.0])
+
+
+def test_resample():
+    """Test the reductions of rows binned on a fixed time grid."""
+    from aiida_logger.utils.resample import resample
+
+    time = np.array([0.0, 20.0, 100.0, 950.0, 1000.0, 5000.0])
+    arrays = {'channel_1': np.arange(12.0).reshape(6, 2)}
+
+    result = resample(time, arrays, 900.0, ['mean', 'min', 'max', 'last', 'count'])
+    np.testing.assert_allclose(result['time'], [0.0, 900.0, 4500.0])
+    np.testing.assert_array_equal(result['count'], [3, 2, 1])
+    np.testing.assert_allclose(result['channel_1_mean'], [[2.0, 3.0], [7.0, 8.0], [10.0, 11.0]])
+    np.testing.assert_allclose(result['channel_1_min'], [[0.0, 1.0], [6.0, 7.0], [10.0, 11.0]])
+    np.testing.assert_allclose(result['channel_1_max'], [[4.0, 5.0], [8.0, 9.0], [10.0, 11.0]])
+    np.testing.assert_allclose(result['channel_1_last'], [[4.0, 5.0], [8.0, 9.0], [10.0, 11.0]])
+
+    result = resample(time, arrays, 900.0, ['mean', 'count'], fill_empty=True)
+    np.testing.assert_array_equal(result['count'], [3, 2, 0, 0, 0, 1])
+    assert np.isnan(result['channel_1_mean'][2:5]).all()
+
+
+def test_resample_start_offsets():
+    """Test that series starting at different times are binned on the same grid of absolute time."""
+    from aiida_logger.utils.resample import resample
+
+    # Two files starting 2019-09-17T11:01:08Z and 7 minutes later, with a row every 5 minutes
+    first_start, second_start = 1568718068.0, 1568718488.0
+    time = np.arange(0.0, 3600.0, 300.0)
+    arrays = {'channel_1': np.arange(12.0)}
+
+    first = resample(time, arrays, 900.0, ['count'], offset=first_start)
+    second = resample(time, arrays, 900.0, ['count'], offset=second_start)
+    # The bins start at multiples of the interval since the epoch, whatever the start of the file
+    assert not (np.fmod(first['time'], 900.0).any() or np.fmod(second['time'], 900.0).any())
+    np.testing.assert_allclose(first['time'], [1568718000.0, 1568718900.0, 1568719800.0, 1568720700.0])
+    np.testing.assert_array_equal(first['count'], [3, 3, 3, 3])
+    np.testing.assert_allclose(second['time'][:-1], first['time'])
+    np.testing.assert_array_equal(second['count'], [2, 3, 3, 3, 1])
+
+    # The same rows with the time as nanoseconds since the epoch give the same bins
+    nanoseconds = (second_start * 1e9 + time * 1e9).astype(np.int64)
+    absolute = resample(nanoseconds / 1e9, arrays, 900.0, ['count'])
+    np.testing.assert_allclose(absolute['time'], second['time'])
+    np.testing.assert_array_equal(absolute['count'], second['count'])
+
+    # An origin shifts the grid by less than an interval
+    shifted = resample(time, arrays, 900.0, ['count'], origin=60.0, offset=first_start)
+    assert np.allclose(np.fmod(shifted['time'] - 60.0, 900.0), 0.0)
+
+
+def test_injection_index():
+    """Test the lookup of the rows of the injections of samples, including repeated runs of a sample."""
+    from aiida_logger.utils.injections import build_injection_index, injection_rows
+
+    sample_id = np.array([3, 3, 1, 1, 1, 2, 3, 3])
+    index = build_injection_index(sample_id)
+    np.testing.assert_array_equal(index, [[1, 2, 5], [2, 5, 6], [3, 0, 2], [3, 6, 8]])
+    np.testing.assert_array_equal(injection_rows(index, 3), [0, 1, 6, 7])
+    np.testing.assert_array_equal(injection_rows(index, [2, 1]), [2, 3, 4, 5])
+    np.testing.assert_array_equal(injection_rows(index, [1, 3], injection=-1), [4, 7])
+    np.testing.assert_array_equal(injection_rows(index, [2, 3], injection=1), [1])
+    assert not len(injection_rows(index, 4))
+
+
+def test_column_statistics():
+    """Test that statistics updated block by block equal those of the whole columns, ignoring NaN."""
+    from aiida_logger.utils.statistics import ColumnStatistics
+
+    values = np.random.RandomState(0).normal(1e6, 3.0, size=(1000, 3))
+    values[[5, 700], 1] = np.nan
+    values[:, 2] = np.nan
+    statistics = ColumnStatistics(3)
+    for block in np.array_split(values, [1, 10, 400, 999]):
+        statistics.add(block)
+    result = statistics.as_dict(['a', 'b', 'c'])
+    assert result['a']['count'] == 1000 and result['a']['nan_count'] == 0
+    assert result['b']['count'] == 998 and result['b']['nan_count'] == 2
+    for label, column in zip('ab', values.T):
+        assert np.isclose(result[label]['mean'], np.nanmean(column))
+        assert np.isclose(result[label]['std'], np.nanstd(column))
+        assert result[label]['min'] == np.nanmin(column) and result[label]['max'] == np.nanmax(column)
+        assert result[label]['first'] == column[0] and result[label]['last'] == column[-1]
+    assert result['c']['count'] == 0 and result['c']['mean'] is None and result['c']['min'] is None
+
+
+def test_export(tmpdir, fixture_synthetic_gc):  # noqa: F811
+    """Test that parses with different channels are exported to one Parquet dataset and one HDF5 file."""
+    import pytest
+    pyarrow = pytest.importorskip('pyarrow')
+    h5py = pytest.importorskip('h5py')
+    from pyarrow import dataset
+    from aiida_logger.utils.export import export_data
+
+    synthetic = fixture_synthetic_gc(250)
+    parses = []
+    for extra in [{}, {'projection': {'channel_2': 'all'}, 'segment_rows': 64, 'time_dtype': 'int64'}]:
+        result = synthetic.parse(**extra)
+        parses.append((result['data'], result['metadata']))
+    full = parses[0][0]
+    start = np.datetime64(parses[0][1].get_dict()['start_time'].rstrip('Z'), 'ns').astype(np.int64)
+    label = 'channel_1/{}'.format(parses[0][1].get_dict()['labels'][0][0])
+
+    summary = export_data(parses, str(tmpdir.join('parquet')), row_group_rows=100, workers=2)
+    assert summary['nodes'] == 2 and summary['rows'] == 500 and len(summary['files']) == 2
+    table = dataset.dataset(str(tmpdir.join('parquet')), format='parquet', partitioning='hive').to_table()
+    table = table.sort_by([('source_uuid', 'ascending'), ('time', 'ascending')])
+    rows = table.filter(pyarrow.compute.equal(table['source_uuid'], full.uuid))
+    np.testing.assert_array_equal(rows['time'].cast(pyarrow.int64()).to_numpy(),
+                                  start + np.rint(full.get_array('time') * 1e9).astype(np.int64))
+    np.testing.assert_array_equal(rows['sample_id'].to_numpy(), full.get_array('id'))
+    np.testing.assert_allclose(rows[label].to_numpy(), full.get_array('channel_1')[:, 0])
+    # The second parse has no channel_1
+    others = table.filter(pyarrow.compute.invert(pyarrow.compute.equal(table['source_uuid'], full.uuid)))
+    assert others[label].null_count == 250
+
+    export_data(parses, str(tmpdir.join('export.h5')), file_format='hdf5', row_group_rows=100)
+    with h5py.File(str(tmpdir.join('export.h5')), 'r') as handle:
+        assert [uuid.decode() for uuid in handle['sources'][()]] == [data.uuid for data, _ in parses]
+        np.testing.assert_array_equal(handle['time'][:250], handle['time'][250:])
+        np.testing.assert_allclose(handle[label][:250], full.get_array('channel_1')[:, 0])
+        assert np.isnan(handle[label][250:]).all()
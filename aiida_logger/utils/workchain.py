@@ -5,9 +5,27 @@ Utils for the workchains.
 """
 from __future__ import absolute_import
 from aiida.engine.processes.exit_code import ExitCode
+from aiida.plugins import CalculationFactory
 
 
 def compose_exit_code(status, message):
     """Compose an ExitCode instance based on a status and message."""
     exit_code = ExitCode(status=status, message=message)
     return exit_code
+
+
+class LazyCalculation():  # pylint: disable=too-few-public-methods
+    """
+    Descriptor for the calculation class used by a workchain.
+
+    The calculation is loaded from its entry point on first access instead of when the
+    workchain module is imported.
+    """
+    def __init__(self, entry_point):
+        self.entry_point = entry_point
+        self._calculation = None
+
+    def __get__(self, instance, owner):
+        if self._calculation is None:
+            self._calculation = CalculationFactory(self.entry_point)
+        return self._calculation
@@ -0,0 +1,222 @@
+"""
+GCBatch workchain
+
+-----------------
+Parse many gc datafiles with a limited number of calculations in flight and calculate
+the concentrations of all of them in one vectorized step. The calculations run in a sliding
+window: a new calculation is submitted as soon as one finishes, such that `max_concurrent`
+calculations are running until no datafiles are left.
+
+The window is kept by overriding `WorkChain.on_process_finished` and registering the next
+calculation with `insert_awaitable` and `runner.call_on_process_finish`, the hooks that
+`to_context` uses. These hooks are part of aiida-core 1.x, which is the range pinned in
+setup.json. The awaitables are stored in the checkpoint of the workchain, such that a
+workchain that is reloaded, e.g. after a restart of the daemon, registers the callbacks of
+the calculations in flight again and continues to fill the window.
+"""
+
+# pylint: disable=attribute-defined-outside-init
+import functools
+
+from aiida.common.extendeddicts import AttributeDict
+from aiida.engine import calcfunction, WorkChain
+from aiida.engine.processes.workchains.awaitable import construct_awaitable
+from aiida.plugins import DataFactory
+
+from aiida_logger.utils.workchain import LazyCalculation
+from aiida_logger.workchains.gc_example import calculate_concentrations_from_areas
+
+
+class GCBatchWorkChain(WorkChain):
+    """Parse a batch of gc datafiles concurrently and calculate their concentrations."""
+
+    _verbose = False
+    _calculation_string = 'logger'
+    _calculation = LazyCalculation(_calculation_string)
+
+    @classmethod
+    def define(cls, spec):
+        super(GCBatchWorkChain, cls).define(spec)
+        spec.expose_inputs(cls._calculation, include=['code', 'datafiles'])
+        # The code is not needed when the datafiles are parsed directly
+        spec.inputs['code'].required = False
+        spec.inputs.validator = validate_inputs
+        spec.input('parameters', valid_type=DataFactory('dict'), help='Parameters for the calculations')
+        spec.input('max_concurrent',
+                   valid_type=DataFactory('int'),
+                   required=False,
+                   default=lambda: DataFactory('int')(10),
+                   help="""
+                   The maximum number of calculations that are running at the same time.
+                   """)
+        spec.input('verbose',
+                   valid_type=DataFactory('bool'),
+                   required=False,
+                   default=lambda: DataFactory('bool')(False),
+                   help="""
+                   If True, enable more detailed output during workchain execution.
+                   """)
+        spec.input('direct',
+                   valid_type=DataFactory('bool'),
+                   required=False,
+                   default=lambda: DataFactory('bool')(False),
+                   help="""
+                   If True, parse the datafiles directly with a calcfunction instead of submitting calculations.
+                   """)
+
+        spec.outline(
+            cls.initialize,
+            cls.get_gc_data,
+            cls.inspect_calculations,
+            cls.process_gc_data,
+            cls.finalize
+        )  # yapf: disable
+        spec.output_namespace('data', valid_type=DataFactory('array'), required=False, dynamic=True, help='The output data of each datafile.')
+        spec.output_namespace('metadata', valid_type=DataFactory('dict'), required=False, dynamic=True, help='The output metadata of each datafile.')
+        spec.output_namespace('concentration_data', valid_type=DataFactory('array'), required=False, dynamic=True,
+                              help='The concentration data of each datafile calculated from the area using the supplied calibration values')
+        spec.output('failures', valid_type=DataFactory('dict'), required=False, help='The exit status and message of each datafile that failed.')
+
+        spec.exit_code(0, 'NO_ERROR', message='the sun is shining')
+        spec.exit_code(421, 'ERROR_ALL_CALCULATIONS_FAILED', message='none of the datafiles could be parsed')
+        spec.exit_code(500, 'ERROR_UNKNOWN', message='unknown error detected in the workchain')
+
+    def initialize(self):
+        """Initialize."""
+        self._verbose = self.inputs.verbose.value
+        self.ctx.exit_code = self.exit_codes.ERROR_UNKNOWN  # pylint: disable=no-member
+        self.ctx.pending = sorted(self.inputs.datafiles.keys())
+        self.ctx.running = []
+        self.ctx.succeeded = {}
+        self.ctx.failed = {}
+
+        parameters_input = self.inputs.parameters.get_dict()['gc']
+        self.ctx.calibration_data = parameters_input.pop('calibration', None)
+        self.ctx.parameters = DataFactory('dict')(dict=parameters_input)
+        self.ctx.metadata = {'options': {'resources': {'num_machines': 1, 'num_mpiprocs_per_machine': 1},
+                                         'parser_name': 'logger',
+                                         'withmpi': False,
+                                         'output_filename': 'logger.out'}}
+
+    def get_gc_data(self):
+        """Get the gc data of all datafiles, keeping at most max_concurrent calculations in flight."""
+        if self.inputs.direct.value:
+            from aiida_logger.calculations.functions import parse_datafile
+            for key in self.ctx.pending:
+                _, node = parse_datafile.run_get_node(self.ctx.parameters, self.inputs.datafiles[key])
+                self.ctx[self._context_key(key)] = node
+                self.ctx.running.append(key)
+            self.ctx.pending = []
+            return None
+
+        # Fill the window, the next calculations are submitted in `on_process_finished`
+        calculations = {}
+        while self.ctx.pending and len(calculations) < self.inputs.max_concurrent.value:
+            key, running = self._submit_next()
+            calculations[self._context_key(key)] = running
+
+        return self.to_context(**calculations)
+
+    def on_process_finished(self, awaitable):
+        """Submit the calculation of the next pending datafile as soon as a calculation finishes."""
+        if self.ctx.pending:
+            key, running = self._submit_next()
+            # Await the new calculation before the finished one is resolved, such that the workchain
+            # only resumes when all calculations are done
+            next_awaitable = construct_awaitable(running)
+            next_awaitable.key = self._context_key(key)
+            self.insert_awaitable(next_awaitable)
+            self.runner.call_on_process_finish(running.pk,
+                                               functools.partial(self.call_soon, self.on_process_finished, next_awaitable))
+            # Store the new awaitable and the pending datafiles, such that a reloaded workchain does not
+            # submit the datafile again
+            if self.runner.persister is not None:
+                self.runner.persister.save_checkpoint(self)
+        super(GCBatchWorkChain, self).on_process_finished(awaitable)
+
+    def _submit_next(self):
+        """Submit the calculation of the next pending datafile and return its key and node."""
+        key = self.ctx.pending.pop(0)
+        inputs = AttributeDict()
+        inputs.code = self.inputs.code
+        inputs.parameters = self.ctx.parameters
+        inputs.datafiles = {key: self.inputs.datafiles[key]}
+        inputs.metadata = self.ctx.metadata
+        running = self.submit(self._calculation, **inputs)
+        if self._verbose:
+            self.report('fetching gc data of {} using {}<{}> '.format(key, self._calculation.__name__, running.pk))
+        self.ctx.running.append(key)
+
+        return key, running
+
+    def inspect_calculations(self):
+        """Sort the finished calculations into succeeded and failed, without aborting on failures."""
+        for key in self.ctx.running:
+            calculation = self.ctx[self._context_key(key)]
+            if calculation.is_finished_ok:
+                self.ctx.succeeded[key] = calculation
+            else:
+                self.ctx.failed[key] = {'pk': calculation.pk,
+                                        'exit_status': calculation.exit_status,
+                                        'exit_message': calculation.exit_message}
+                self.report('The datafile {} failed in {}<{}> with exit status {}'.format(key, calculation.__class__.__name__,
+                                                                                           calculation.pk, calculation.exit_status))
+        self.ctx.running = []
+
+    def process_gc_data(self):
+        """Calculate the concentrations from the area of all succeeded datafiles in one step."""
+        if self.ctx.failed:
+            failed = {key: self.inputs.datafiles[key] for key in self.ctx.failed}
+            self.out('failures', collect_failures(DataFactory('dict')(dict=self.ctx.failed), **failed))
+        if not self.ctx.succeeded:
+            self.report('None of the {} datafiles could be parsed'.format(len(self.ctx.failed)))
+            self.ctx.exit_code = self.exit_codes.ERROR_ALL_CALCULATIONS_FAILED  # pylint: disable=no-member
+            return self.ctx.exit_code
+
+        data = {key: calculation.outputs.data for key, calculation in self.ctx.succeeded.items()}
+        if self.ctx.calibration_data is not None:
+            calibration_data = DataFactory('list')(list=self.ctx.calibration_data)
+            concentration_data = calculate_concentrations_from_areas(self.ctx.parameters, calibration_data, **data)
+            self.out('concentration_data', concentration_data)
+        self.ctx.exit_code = self.exit_codes.NO_ERROR  # pylint: disable=no-member
+
+        return None
+
+    def finalize(self):
+        """Finalize the calculation."""
+        self.out('data', {key: calculation.outputs.data for key, calculation in self.ctx.succeeded.items()})
+        self.out('metadata', {key: calculation.outputs.metadata for key, calculation in self.ctx.succeeded.items()})
+
+        return self.ctx.exit_code
+
+    @staticmethod
+    def _context_key(key):
+        """Return the key in the context of the calculation of a datafile."""
+        return 'calculation_{}'.format(key)
+
+
+def validate_inputs(inputs, _=None):
+    """
+    Validate that a code is given, unless the datafiles are parsed directly, that calculations can
+    be submitted, and that the data layout is given when the data is calibrated, as the datafiles
+    are calibrated with one layout.
+    """
+    max_concurrent = inputs.get('max_concurrent', None)
+    if max_concurrent is not None and max_concurrent.value < 1:
+        return 'max_concurrent must be at least 1, otherwise no calculations are submitted'
+    direct = inputs.get('direct', None)
+    if 'code' not in inputs and (direct is None or not direct.value):
+        return 'a code is required, unless the datafiles are parsed directly with direct set to True'
+    parameters = inputs['parameters'].get_dict().get('gc', {}) if 'parameters' in inputs else {}
+    if 'calibration' in parameters and parameters.get('data_layout', 'auto') == 'auto':
+        return 'the data_layout must be given to calibrate the datafiles, a sniffed layout can differ between them'
+    return None
+
+
+@calcfunction
+def collect_failures(failures, **datafiles):
+    """Collect the exit status and message of each datafile that failed, with the uuid of the datafile."""
+    collected = failures.get_dict()
+    for key, datafile in datafiles.items():
+        collected[key]['datafile'] = datafile.uuid
+    return DataFactory('dict')(dict=collected)
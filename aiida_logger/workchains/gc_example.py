@@ -8,9 +8,9 @@ Estimate the performance based on example spreadsheet and gc data.
 # pylint: disable=attribute-defined-outside-init
 from aiida.common.extendeddicts import AttributeDict
 from aiida.engine import calcfunction, WorkChain, append_
-from aiida.plugins import DataFactory, CalculationFactory
+from aiida.plugins import DataFactory
 
-from aiida_logger.utils.workchain import compose_exit_code
+from aiida_logger.utils.workchain import compose_exit_code, LazyCalculation
 
 
 class GCExampleWorkChain(WorkChain):
@@ -18,12 +18,15 @@ class GCExampleWorkChain(WorkChain):
 
     _verbose = False
     _calculation_string = 'logger'
-    _calculation = CalculationFactory(_calculation_string)
+    _calculation = LazyCalculation(_calculation_string)
 
     @classmethod
     def define(cls, spec):
         super(GCExampleWorkChain, cls).define(spec)
         spec.expose_inputs(cls._calculation, exclude=['parameters', 'metadata'])
+        # The code is not needed when the datafile is parsed directly
+        spec.inputs['code'].required = False
+        spec.inputs.validator = validate_inputs
         #spec.expose_inputs(cls._calculation, include=['metadata'], namespace='calc')
         spec.input('options', valid_type=dict, required=False)
         spec.input('parameters', valid_type=DataFactory('dict'), help='Parameters for the calculations')
@@ -34,6 +37,13 @@ class GCExampleWorkChain(WorkChain):
                    help="""
                    If True, enable more detailed output during workchain execution.
                    """)
+        spec.input('direct',
+                   valid_type=DataFactory('bool'),
+                   required=False,
+                   default=lambda: DataFactory('bool')(False),
+                   help="""
+                   If True, parse the datafile directly with a calcfunction instead of submitting a calculation.
+                   """)
 
         spec.outline(
             cls.initialize,
@@ -44,8 +54,10 @@ class GCExampleWorkChain(WorkChain):
             cls.finalize
         )  # yapf: disable
         spec.output('concentration_data', valid_type=DataFactory('array'), required=False, help='The concentration data calculated from the area using the supplied calibration values')
+        spec.output('resampled_data', valid_type=DataFactory('array'), required=False, help='The gc data resampled on a fixed time grid, if resample is given in the parameters')
         
-        spec.expose_outputs(cls._calculation)
+        # Only the parsed outputs, which are also created when the datafile is parsed directly
+        spec.expose_outputs(cls._calculation, include=['data', 'metadata'])
 
         spec.exit_code(0, 'NO_ERROR', message='the sun is shining')
         spec.exit_code(420, 'ERROR_NO_CALLED_CALCULATION', message='no called calculation detected')
@@ -88,18 +100,32 @@ class GCExampleWorkChain(WorkChain):
         # Add necessary additional inputs
         parameters_input = self.inputs.parameters.get_dict()['gc']
         self.ctx.calibration_data = parameters_input.pop('calibration', None)
+        self.ctx.resample = self.inputs.parameters.get_dict().get('resample', None)
         parameters = DataFactory('dict')(dict=parameters_input)
         self.ctx.inputs.parameters = parameters
 
     def get_gc_data(self):
         """Get the gc data."""
         inputs = self.ctx.inputs
+        if self.inputs.direct.value:
+            return self._get_gc_data_direct()
         running = self.submit(self._calculation, **inputs)
 
         self.report('fetching gc data using {}<{}> '.format(self._calculation.__name__, running.pk))
 
         return self.to_context(calculations=append_(running))
 
+    def _get_gc_data_direct(self):
+        """Get the gc data by parsing the datafile in this process, without submitting a calculation."""
+        from aiida_logger.calculations.functions import parse_datafile
+        datafiles = list(self.ctx.inputs.datafiles.values())
+        if len(datafiles) != 1:
+            raise ValueError('Exactly one datafile is supported when parsing directly.')
+        _, node = parse_datafile.run_get_node(self.ctx.inputs.parameters, datafiles[0])
+
+        self.report('fetched gc data using {}<{}> '.format(parse_datafile.__name__, node.pk))
+        self.ctx.calculations = [node]
+
     def verify_calculation(self):
         """Verify calculation."""
 
@@ -130,9 +156,17 @@ class GCExampleWorkChain(WorkChain):
         data = gc_data.outputs.data
 
         calibration_data = DataFactory('list')(list=self.ctx.calibration_data)
-        concentration_data = calculate_concentration_from_area(self.ctx.inputs.parameters, calibration_data, data)
+        # The metadata holds the data layout if it was sniffed from the datafile
+        concentration_data = calculate_concentration_from_area(self.ctx.inputs.parameters, calibration_data, data,
+                                                               gc_data.outputs.metadata)
     
         self.out('concentration_data', concentration_data)
+
+        # Then resample the data on a fixed time grid if requested
+        if self.ctx.resample is not None:
+            from aiida_logger.calculations.functions import resample_data
+            self.out('resampled_data', resample_data(DataFactory('dict')(dict=self.ctx.resample), data,
+                                                     gc_data.outputs.metadata))
         
     def finalize(self):
         """Finalize the calculation."""
@@ -140,27 +174,61 @@ class GCExampleWorkChain(WorkChain):
         self.out_many(self.exposed_outputs(calculation, self._calculation))
 
 
+def validate_inputs(inputs, _=None):
+    """Validate that a code is given, unless the datafile is parsed directly."""
+    direct = inputs.get('direct', None)
+    if 'code' not in inputs and (direct is None or not direct.value):
+        return 'a code is required, unless the datafile is parsed directly with direct set to True'
+    return None
+
+
 @calcfunction
-def calculate_concentration_from_area(parameters_data, calibration_data, data):
-    import numpy as np
-    """Calculate the concentration from the area and the calibration."""
-    channels = [item for item in data.get_arraynames() if item != 'time' and item != 'id']
+def calculate_concentration_from_area(parameters_data, calibration_data, data, metadata=None):
+    """
+    Calculate the concentration from the area and the calibration.
+
+    If the data layout in the parameters is `auto`, the layout sniffed from the datafile is taken
+    from the metadata of the parse.
+    """
+    from aiida_logger.utils.calibration import compile_calibration
     parameters = parameters_data.get_dict()
-    start_slice = 0
+    data_layout = resolve_data_layout(parameters, metadata)
+    engine = compile_calibration(calibration_data.get_list(), data_layout, parameters.get('projection'))
     concentration_data = DataFactory('array')()
-    for index, channel in enumerate(channels):
-        calibration = []
-        calibration_species = []
-        for item in calibration_data[index]:
-            calibration.append(list(item.values())[0])
-            calibration_species.append(list(item.keys())[0] + ' area')
-        calibration = np.array(calibration)
-        slicing_index = 0
-        for index, item in enumerate(parameters['data_layout'][index]):
-            if 'concentration' in list(item.keys())[0]:
-                slicing_index = slicing_index + 1
-        area = data.get_array(channel)
-        # concentration = area x calibration
-        concentration = area[:,slicing_index::] * calibration
+    for channel, concentration in engine.apply(data).items():
         concentration_data.set_array(channel, concentration)
     return concentration_data
+
+
+@calcfunction
+def calculate_concentrations_from_areas(parameters_data, calibration_data, **data):
+    """Calculate the concentrations of several data sets from the area and the calibration in one evaluation."""
+    from aiida_logger.utils.calibration import compile_calibration
+    parameters = parameters_data.get_dict()
+    engine = compile_calibration(calibration_data.get_list(), resolve_data_layout(parameters),
+                                 parameters.get('projection'))
+    keys = list(data.keys())
+    results = {}
+    for key, concentrations in zip(keys, engine.apply_many([data[key] for key in keys])):
+        concentration_data = DataFactory('array')()
+        for channel, concentration in concentrations.items():
+            concentration_data.set_array(channel, concentration)
+        results[key] = concentration_data
+    return results
+
+
+def resolve_data_layout(parameters, metadata=None):
+    """
+    Return the data layout of the parameters, or the layout sniffed by the parser if it is `auto`.
+
+    :param parameters: the parameters of the gc parser.
+    :param metadata: the metadata Dict of a parse, which holds the sniffed data layout.
+    :raises ValueError: if the layout was sniffed and is not in the metadata.
+    """
+    data_layout = parameters.get('data_layout', 'auto')
+    if data_layout != 'auto':
+        return data_layout
+    if metadata is None or 'data_layout' not in metadata.get_dict():
+        raise ValueError('The data layout is auto, the calibration needs the metadata of the parse, '
+                         'which holds the sniffed data layout.')
+    return metadata.get_dict()['data_layout']
@@ -0,0 +1,152 @@
+"""
+Tests for workchains.
+
+"""
+from __future__ import print_function
+from __future__ import absolute_import
+
+import os
+import numpy as np
+import pytest
+
+from aiida_logger.utils.fixtures.data import GC_EXAMPLE_LAYOUT
+
+CALIBRATION = [[{'He': 2.0}, {'H2': [1.0, 0.5]}], [{'CO2': 3.0}]]
+
+
+def gc_datafile():
+    """Return the example gc datafile."""
+    from aiida.plugins import DataFactory
+    from aiida_logger.tests import TEST_DIR  # pylint: disable=wrong-import-position
+
+    return DataFactory('singlefile')(file=os.path.join(TEST_DIR, 'input_files', 'gc_example.txt'))
+
+
+def test_gc_batch(logger_code):
+    """Test parsing several datafiles with fewer calculations in flight than datafiles."""
+    from aiida.plugins import DataFactory
+    from aiida.engine import run_get_node
+
+    from aiida_logger.workchains.gc_batch import GCBatchWorkChain
+
+    parameters = {'gc': {'data_start_line': 2, 'data_layout': GC_EXAMPLE_LAYOUT, 'separator': '\t', 'calibration': CALIBRATION}}
+    keys = ['first', 'second', 'third', 'fourth', 'fifth']
+    inputs = {
+        'code': logger_code,
+        'parameters': DataFactory('dict')(dict=parameters),
+        'datafiles': {key: gc_datafile() for key in keys},
+        'max_concurrent': DataFactory('int')(2),
+    }
+    result, node = run_get_node(GCBatchWorkChain, **inputs)
+
+    assert node.is_finished_ok
+    assert sorted(result['data']) == sorted(keys)
+    assert sorted(result['metadata']) == sorted(keys)
+    assert 'failures' not in result
+    # Every datafile was parsed by its own calculation, with at most two running at any time
+    calculations = [called for called in node.called if called.process_label == 'LoggerCalculation']
+    assert len(calculations) == len(keys)
+    for calculation in calculations:
+        running = [other for other in calculations if other.ctime <= calculation.ctime < other.mtime]
+        assert len(running) <= 2
+    areas = result['data']['first'].get_array('channel_1')
+    concentrations = result['concentration_data']['second'].get_array('channel_1')
+    np.testing.assert_allclose(concentrations, np.stack([2.0 * areas[:, 6], 1.0 + 0.5 * areas[:, 7]], axis=1))
+
+
+def test_gc_example_direct():
+    """Test running the example workchain with the datafile parsed directly, without a code."""
+    from aiida.plugins import DataFactory
+    from aiida.engine import run_get_node
+
+    from aiida_logger.workchains.gc_example import GCExampleWorkChain
+
+    parameters = {
+        'gc': {'data_start_line': 2, 'data_layout': GC_EXAMPLE_LAYOUT, 'separator': '\t', 'calibration': CALIBRATION},
+        'resample': {'interval': 600.0},
+    }
+    inputs = {
+        'parameters': DataFactory('dict')(dict=parameters),
+        'datafiles': {'datafile': gc_datafile()},
+        'direct': DataFactory('bool')(True),
+    }
+    result, node = run_get_node(GCExampleWorkChain, **inputs)
+
+    assert node.is_finished_ok
+    assert sorted(result) == ['concentration_data', 'data', 'metadata', 'resampled_data']
+    areas = result['data'].get_array('channel_1')
+    np.testing.assert_allclose(result['concentration_data'].get_array('channel_1'),
+                               np.stack([2.0 * areas[:, 6], 1.0 + 0.5 * areas[:, 7]], axis=1))
+    assert result['resampled_data'].get_array('time')[0] == 1568718000.0
+
+
+def test_gc_batch_requires_code():
+    """Test that the code is required unless the datafiles are parsed directly."""
+    from aiida.plugins import DataFactory
+
+    from aiida_logger.workchains.gc_batch import validate_inputs
+
+    inputs = {'parameters': DataFactory('dict')(dict={'gc': {}}), 'datafiles': {'first': gc_datafile()}}
+    assert 'code is required' in validate_inputs(inputs)
+    inputs['direct'] = DataFactory('bool')(False)
+    assert 'code is required' in validate_inputs(inputs)
+    inputs['direct'] = DataFactory('bool')(True)
+    assert validate_inputs(inputs) is None
+    # Without room for a calculation the datafiles would never be parsed
+    inputs['max_concurrent'] = DataFactory('int')(0)
+    assert 'max_concurrent must be at least 1' in validate_inputs(inputs)
+    del inputs['max_concurrent']
+    # A sniffed layout can differ between the datafiles that are calibrated together
+    inputs['parameters'] = DataFactory('dict')(dict={'gc': {'data_layout': 'auto', 'calibration': CALIBRATION}})
+    assert 'data_layout must be given' in validate_inputs(inputs)
+
+
+def test_gc_example_requires_code():
+    """Test that the code is required unless the datafile is parsed directly."""
+    from aiida.plugins import DataFactory
+
+    from aiida_logger.workchains.gc_example import validate_inputs
+
+    inputs = {'parameters': DataFactory('dict')(dict={'gc': {}}), 'datafiles': {'datafile': gc_datafile()}}
+    assert 'code is required' in validate_inputs(inputs)
+    inputs['direct'] = DataFactory('bool')(True)
+    assert validate_inputs(inputs) is None
+
+
+def test_resolve_data_layout():
+    """Test that a sniffed data layout is taken from the metadata of the parse for the calibration."""
+    from aiida.plugins import DataFactory
+
+    from aiida_logger.workchains.gc_example import resolve_data_layout
+
+    assert resolve_data_layout({'data_layout': GC_EXAMPLE_LAYOUT}) == GC_EXAMPLE_LAYOUT
+    metadata = DataFactory('dict')(dict={'data_layout': GC_EXAMPLE_LAYOUT})
+    assert resolve_data_layout({'data_layout': 'auto'}, metadata) == GC_EXAMPLE_LAYOUT
+    assert resolve_data_layout({}, metadata) == GC_EXAMPLE_LAYOUT
+    with pytest.raises(ValueError):
+        resolve_data_layout({'data_layout': 'auto'})
+
+
+def test_calculate_concentrations_from_areas():
+    """Test calculating the concentrations of several data sets in one calcfunction."""
+    from aiida.plugins import DataFactory
+
+    from aiida_logger.workchains.gc_example import calculate_concentrations_from_areas
+
+    data = {}
+    for key, scale in [('first', 1.0), ('second', 10.0)]:
+        data[key] = DataFactory('array')()
+        data[key].set_array('channel_1', scale * np.arange(1.0, 25.0).reshape(2, 12))
+        data[key].set_array('channel_2', scale * np.arange(1.0, 9.0).reshape(2, 4))
+    parameters = DataFactory('dict')(dict={'data_layout': GC_EXAMPLE_LAYOUT})
+    calibration = DataFactory('list')(list=CALIBRATION)
+
+    result, node = calculate_concentrations_from_areas.run_get_node(parameters, calibration, **data)
+
+    assert node.is_finished_ok
+    assert sorted(result) == ['first', 'second']
+    for key, scale in [('first', 1.0), ('second', 10.0)]:
+        areas = data[key].get_array('channel_1')
+        np.testing.assert_allclose(result[key].get_array('channel_1'),
+                                   np.stack([2.0 * areas[:, 6], 1.0 + 0.5 * areas[:, 7]], axis=1))
+        np.testing.assert_allclose(result[key].get_array('channel_2'), 3.0 * scale * np.array([[3.0], [7.0]]))
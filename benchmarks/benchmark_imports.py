@@ -0,0 +1,101 @@
+"""
+Benchmark the import time of the entry points of the plugin.
+
+Each entry point in setup.json is loaded in a fresh interpreter, after the parts of AiiDA
+that a daemon worker or verdi has already imported, such that only the cost of the plugin
+itself is measured. Heavy modules that are imported as a side effect are reported. The
+results are stored as JSON in the results folder, named after the version of the plugin.
+
+Example::
+
+    python benchmark_imports.py --max-ms 50
+"""
+import argparse
+import importlib
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), os.pardir)
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'results')
+# Modules that should not be imported just by loading an entry point
+HEAVY_MODULES = ['numpy', 'dateutil', 'fleep', 'aiida_logger.parsers.file_parsers.gc']
+
+_MEASURE = """
+import importlib, json, sys, time
+import aiida.engine, aiida.orm, aiida.plugins
+before = set(sys.modules)
+start = time.perf_counter()
+module = importlib.import_module({module!r})
+getattr(module, {attribute!r})
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'imported': sorted(set(sys.modules) - before)}}))
+"""
+
+
+def entry_points():
+    """Return the group, name, module and attribute of each entry point in setup.json."""
+    with open(os.path.join(ROOT_DIR, 'setup.json')) as handle:
+        groups = json.load(handle)['entry_points']
+    for group, items in groups.items():
+        for item in items:
+            name, target = [part.strip() for part in item.split('=')]
+            module, attribute = target.split(':')
+            yield group, name, module, attribute
+
+
+def measure(module, attribute, repeat):
+    """Return the best import time in seconds and the modules imported by the last repetition."""
+    timings = []
+    for _ in range(repeat):
+        output = subprocess.check_output([sys.executable, '-c', _MEASURE.format(module=module, attribute=attribute)],
+                                         cwd=ROOT_DIR)
+        result = json.loads(output.decode('utf-8').strip().splitlines()[-1])
+        timings.append(result['seconds'])
+    return min(timings), result['imported']
+
+
+def main():
+    """Measure all entry points, store the results and fail if any are slower than the threshold."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeat', type=int, default=5, help='Number of fresh interpreters per entry point.')
+    parser.add_argument('--max-ms', type=float, default=None, help='Fail if an entry point takes longer to import.')
+    parser.add_argument('--output', default=None, help='File to store the results in.')
+    arguments = parser.parse_args()
+
+    version = importlib.import_module('aiida_logger').__version__
+    results = []
+    failed = False
+    for group, name, module, attribute in entry_points():
+        seconds, imported = measure(module, attribute, arguments.repeat)
+        heavy = [item for item in HEAVY_MODULES if item in imported]
+        slow = arguments.max_ms is not None and seconds * 1e3 > arguments.max_ms
+        failed = failed or slow
+        print('{:<20} {:<20} {:>10.2f} ms {:>5} modules{}{}'.format(group, name, seconds * 1e3, len(imported),
+                                                                    ' heavy: {}'.format(', '.join(heavy)) if heavy else '',
+                                                                    ' SLOW' if slow else ''))
+        results.append({
+            'group': group,
+            'name': name,
+            'milliseconds': seconds * 1e3,
+            'modules': len(imported),
+            'heavy_modules': heavy
+        })
+
+    output = arguments.output
+    if output is None:
+        if not os.path.isdir(RESULTS_DIR):
+            os.makedirs(RESULTS_DIR)
+        output = os.path.join(RESULTS_DIR, 'imports-{}.json'.format(version))
+    with open(output, 'w') as handle:
+        json.dump({'version': version, 'date': datetime.now().isoformat(), 'results': results}, handle, indent=2)
+    print('\nResults stored in {}'.format(output))
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+"""
+Benchmark the parsing and processing of GC data.
+
+Synthetic GC logs of increasing size are generated and the time, throughput and peak
+memory of the GC parser, the logger parser and the calculation of concentrations are
+measured. The results are stored as JSON in the results folder, named after the version
+of the plugin, such that runs can be compared across releases.
+
+Example::
+
+    verdi run benchmark_parsers.py --rows 1000 100000 10000000 --compare results/0.1.0.json
+"""
+# pylint: disable=wrong-import-position
+import argparse
+import json
+import os
+import platform
+import resource
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from aiida import load_profile
+load_profile()
+
+from aiida import orm
+from aiida.common.links import LinkType
+from aiida.plugins import CalculationFactory, DataFactory
+
+import aiida_logger
+from aiida_logger.parsers.file_parsers.gc import GCParser
+from aiida_logger.parsers.logger import LoggerParser
+from aiida_logger.utils.synthetic import write_synthetic_log
+from aiida_logger.workchains.gc_example import calculate_concentration_from_area
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'results')
+DEFAULT_ROWS = [1000, 10000, 100000, 1000000, 10000000]
+
+
+class LocalFolder():  # pylint: disable=too-few-public-methods
+    """A folder on the local disk, such that the parser can be timed without copying into the repository."""
+    def __init__(self, path):
+        self.path = path
+
+    def open(self, filename, mode='r'):
+        return open(os.path.join(self.path, filename), mode)
+
+
+def measure(function, repeat):
+    """Return the best wall time over the repetitions and the peak memory of one call in bytes."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return min(timings), peak
+
+
+def logger_calculation_node(datafile, parameters, computer):
+    """Create a stored LoggerCalculation node with the datafile in its retrieved folder."""
+    node = orm.CalcJobNode(computer=computer, process_type='aiida.calculations:logger')
+    node.set_option('resources', {'num_machines': 1, 'num_mpiprocs_per_machine': 1})
+    node.add_incoming(parameters, link_type=LinkType.INPUT_CALC, link_label='parameters')
+    node.add_incoming(datafile, link_type=LinkType.INPUT_CALC, link_label='datafiles__gc')
+    parameters.store()
+    datafile.store()
+    node.store()
+    retrieved = orm.FolderData()
+    with datafile.open(mode='rb') as handle:
+        retrieved.put_object_from_filelike(handle, datafile.filename, mode='wb')
+    retrieved.add_incoming(node, link_type=LinkType.CREATE, link_label='retrieved')
+    retrieved.store()
+
+    return node
+
+
+def run_benchmarks(arguments):  # pylint: disable=too-many-locals
+    """Run the benchmarks for all sizes and return the results."""
+    computer = orm.Computer.objects.get(name=arguments.computer)
+    exit_codes = CalculationFactory('logger').exit_codes
+    results = []
+    for rows in arguments.rows:
+        with tempfile.TemporaryDirectory() as directory:
+            filename = 'synthetic.txt'
+            path = os.path.join(directory, filename)
+            with open(path, 'w') as handle:
+                settings = write_synthetic_log(handle,
+                                               rows,
+                                               channels=arguments.channels,
+                                               species=arguments.species,
+                                               ignore_columns=not arguments.no_ignore_columns,
+                                               time_format=arguments.time_format)
+            size = os.path.getsize(path)
+            parameters = DataFactory('dict')(dict=settings)
+            # Calibrate each area column
+            area_labels = [[list(item.keys())[0] for item in channel if list(item.keys())[0].endswith(' area')]
+                           for channel in settings['data_layout']]
+            calibration = DataFactory('list')(list=[[{label[:-len(' area')]: 1e-6} for label in labels]
+                                                    for labels in area_labels])
+
+            benchmarks = []
+            benchmarks.append(('GCParser.parse', lambda: GCParser(LocalFolder(directory), filename, exit_codes,
+                                                                     parameters).parse()))
+            if not arguments.skip_logger_parser:
+                node = logger_calculation_node(DataFactory('singlefile')(file=path), parameters, computer)
+                benchmarks.append(('LoggerParser.parse', lambda: LoggerParser(node).parse()))
+            data = GCParser(LocalFolder(directory), filename, exit_codes, parameters).parse()['data']
+            benchmarks.append(('calculate_concentration_from_area',
+                               lambda: calculate_concentration_from_area(
+                                   parameters, calibration, data, metadata={'store_provenance': False})))
+
+            for name, function in benchmarks:
+                seconds, peak = measure(function, arguments.repeat)
+                result = {
+                    'benchmark': name,
+                    'rows': rows,
+                    'bytes': size,
+                    'seconds': seconds,
+                    'rows_per_second': rows / seconds,
+                    'mb_per_second': size / seconds / 1e6,
+                    'peak_memory_mb': peak / 1e6,
+                }
+                print('{benchmark:<36} {rows:>10} rows {seconds:>10.4f} s {rows_per_second:>14.0f} rows/s '
+                      '{mb_per_second:>10.2f} MB/s {peak_memory_mb:>10.2f} MB peak'.format(**result))
+                results.append(result)
+
+    return results
+
+
+def compare(results, previous):
+    """Print the ratio of the timings compared to a previous run."""
+    reference = {(item['benchmark'], item['rows']): item for item in previous['results']}
+    print('\nCompared to version {} ({}):'.format(previous['version'], previous['date']))
+    for item in results:
+        key = (item['benchmark'], item['rows'])
+        if key in reference:
+            print('{:<36} {:>10} rows {:>8.2f}x time {:>8.2f}x memory'.format(
+                item['benchmark'], item['rows'], item['seconds'] / reference[key]['seconds'],
+                item['peak_memory_mb'] / max(reference[key]['peak_memory_mb'], 1e-9)))
+
+
+def main():
+    """Parse the command line, run the benchmarks and store the results."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS, help='Number of rows of the logs.')
+    parser.add_argument('--channels', type=int, default=2, help='Number of channels.')
+    parser.add_argument('--species', type=int, default=6, help='Number of species, i.e. columns per quantity, per channel.')
+    parser.add_argument('--no-ignore-columns', action='store_true', help='Do not separate quantities by an empty column.')
+    parser.add_argument('--time-format', default='%m/%d/%Y %H:%M:%S', help='Format of the timestamps.')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of repetitions of the timings.')
+    parser.add_argument('--computer', default='localhost', help='Computer of the LoggerCalculation nodes.')
+    parser.add_argument('--skip-logger-parser', action='store_true', help='Skip the benchmark of LoggerParser.')
+    parser.add_argument('--output', default=None, help='File to store the results in.')
+    parser.add_argument('--compare', default=None, help='Results of a previous run to compare with.')
+    arguments = parser.parse_args()
+
+    results = run_benchmarks(arguments)
+    content = {
+        'version': aiida_logger.__version__,
+        'date': datetime.now().isoformat(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3,
+        'arguments': vars(arguments),
+        'results': results,
+    }
+    output = arguments.output
+    if output is None:
+        if not os.path.isdir(RESULTS_DIR):
+            os.makedirs(RESULTS_DIR)
+        output = os.path.join(RESULTS_DIR, '{}.json'.format(aiida_logger.__version__))
+    with open(output, 'w') as handle:
+        json.dump(content, handle, indent=2)
+    print('\nResults stored in {}'.format(output))
+
+    if arguments.compare:
+        with open(arguments.compare) as handle:
+            compare(results, json.load(handle))
+
+
+if __name__ == '__main__':
+    main()